@@ -12,8 +12,13 @@ __email__ = "kishanraj41@gmail.com"
 # Import main classes for easy access
 from .database import LineageDatabase
 from .tracker import DatasetTracker, hash_file, get_file_info
-from .graph import LineageGraph
-from .reporter import ComplianceReporter
+
+# Loaded on first access (see __getattr__) to keep networkx/matplotlib
+# out of the import path for tracking-only usage
+_LAZY_IMPORTS = {
+    'LineageGraph': '.graph',
+    'ComplianceReporter': '.reporter',
+}
 
 # Define what's available when doing "from autolineage import *"
 __all__ = [
@@ -27,6 +32,17 @@ __all__ = [
 ]
 
 
+def __getattr__(name):
+    """Lazily import LineageGraph and ComplianceReporter (PEP 562)."""
+    if name in _LAZY_IMPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value  # Cache so __getattr__ isn't hit again
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_version():
     """Return the current version."""
     return __version__
@@ -3,20 +3,27 @@ Command-line interface for AutoLineage.
 """
 
 import click
+import logging
 import sys
 import os
-from pathlib import Path
 
 
 @click.group()
 @click.version_option(version='0.1.0')
-def cli():
+@click.option('--verbose', '-v', is_flag=True, help='Show debug output')
+def cli(verbose):
     """
     AutoLineage - Automatic ML Data Lineage Tracking
     
     Track your data lineage automatically from raw data to trained models.
     """
-    pass
+    # Library modules log instead of printing; show their progress here
+    logger = logging.getLogger('autolineage')
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
 
 
 @cli.command()
@@ -108,8 +115,8 @@ def show(db, output, format):
     # Load database
     database = LineageDatabase(db)
     
-    # Create graph
-    graph = LineageGraph(database)
+    # Create graph (edge list cached on disk between invocations)
+    graph = LineageGraph(database, use_cache=True)
     graph.build()
     
     # Check if empty
@@ -156,47 +163,47 @@ def summary(db):
     
     database = LineageDatabase(db)
     
-    # Get all data
-    datasets = database.get_all_datasets()
-    operations = database.get_all_operations()
-    graph_data = database.get_lineage_graph()
+    # Counts, plus only the rows that are shown
+    counts = database.get_counts()
+    datasets = database.get_all_datasets(limit=10)
+    graph_data = database.get_lineage_graph(limit=10)
     
     click.echo(f"\n{'='*60}")
     click.echo("LINEAGE SUMMARY")
     click.echo(f"{'='*60}\n")
     
-    click.echo(f"Datasets: {len(datasets)}")
-    click.echo(f"Operations: {len(operations)}")
-    click.echo(f"Lineage edges: {len(graph_data)}")
+    click.echo(f"Datasets: {counts['datasets']}")
+    click.echo(f"Operations: {counts['operations']}")
+    click.echo(f"Lineage edges: {counts['lineage']}")
     
     if datasets:
         click.echo(f"\n{'='*60}")
         click.echo("DATASETS")
         click.echo(f"{'='*60}")
         
-        for ds in datasets[:10]:  # Show first 10
-            filename = Path(ds['filepath']).name
+        for ds in datasets:  # Show first 10
+            filename = os.path.basename(ds['filepath'])
             click.echo(f"\n• {filename}")
             click.echo(f"  Hash: {ds['hash'][:16]}...")
             click.echo(f"  Size: {ds['size']} bytes")
             click.echo(f"  Format: {ds['format']}")
         
-        if len(datasets) > 10:
-            click.echo(f"\n... and {len(datasets) - 10} more")
+        if counts['datasets'] > 10:
+            click.echo(f"\n... and {counts['datasets'] - 10} more")
     
     if graph_data:
         click.echo(f"\n{'='*60}")
         click.echo("DATA FLOW")
         click.echo(f"{'='*60}")
         
-        for edge in graph_data[:10]:  # Show first 10
-            source = Path(edge['source']).name
-            target = Path(edge['target']).name
+        for edge in graph_data:  # Show first 10
+            source = os.path.basename(edge['source'])
+            target = os.path.basename(edge['target'])
             op = edge['operation'] or 'unknown'
             click.echo(f"  {source} → {target} ({op})")
         
-        if len(graph_data) > 10:
-            click.echo(f"\n... and {len(graph_data) - 10} more edges")
+        if counts['lineage'] > 10:
+            click.echo(f"\n... and {counts['lineage'] - 10} more edges")
     
     database.close()
 
@@ -259,6 +266,11 @@ def clear(db):
     
     if click.confirm(f"Are you sure you want to delete {db}?"):
         os.remove(db)
+        # Remove WAL sidecar files left behind by an unclean shutdown,
+        # and the graph edge cache written by 'lineage show'
+        for suffix in ('-wal', '-shm', '.lineage_cache.json'):
+            if os.path.exists(db + suffix):
+                os.remove(db + suffix)
         click.echo(f"✓ Deleted {db}")
     else:
         click.echo("Cancelled")
@@ -3,16 +3,189 @@ Database module for storing lineage metadata.
 Uses SQLite for simplicity and portability.
 """
 
+import json
+import os
 import sqlite3
-import uuid
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+try:
+    import orjson  # Optional: faster JSON encoding
+except ImportError:
+    orjson = None
+
+
+# Secondary indexes: (name, "table(columns) [WHERE ...]").
+# Cover the lineage JOIN/ORDER BY columns and dataset hash lookups.
+_INDEXES = [
+    # (source, target) pairs answer edge lookups from the index alone;
+    # the source_id prefix still serves downstream traversals
+    ("idx_lineage_source", "lineage(source_id, target_id)"),
+    ("idx_lineage_target", "lineage(target_id)"),
+    # Edges without an operation are never looked up by it
+    ("idx_lineage_operation", "lineage(operation_id) WHERE operation_id IS NOT NULL"),
+    ("idx_lineage_created", "lineage(created_at)"),
+    ("idx_datasets_hash", "datasets(hash)"),
+    ("idx_datasets_filepath", "datasets(filepath, hash)"),
+]
+
+# Graph layouts kept in layout_cache; older ones are dropped on save
+_LAYOUT_CACHE_SIZE = 32
+
+
+def _dumps(value: Any, indent: bool = False) -> bytes:
+    """
+    Serialize a value as UTF-8 JSON.
+    
+    Uses orjson when installed, falling back to the json module for
+    payloads orjson rejects (e.g. non-string keys).
+    
+    Args:
+        value: Value to serialize
+        indent: Indent nested values by two spaces
+        
+    Returns:
+        Encoded JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else None)
+        except TypeError:
+            pass
+    return json.dumps(value, indent=2 if indent else None).encode('utf-8')
+
+
+def _to_json(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Serialize a metadata/parameters dict for storage.
+    
+    Empty or missing values are stored as NULL without serializing.
+    
+    Args:
+        value: Dictionary to serialize
+        
+    Returns:
+        JSON string, or None if value is empty
+    """
+    if not value:
+        return None
+    return _dumps(value).decode('utf-8')
+
+
+def _new_id() -> str:
+    """
+    Generate a time-ordered UUID (version 7).
+    
+    48-bit millisecond timestamp followed by random bits, so IDs sort
+    by creation time. Cheaper than str(uuid.uuid4()) as no UUID object
+    is allocated.
+    
+    Returns:
+        UUID string (36 characters)
+    """
+    value = ((time.time_ns() // 1_000_000) << 80) | int.from_bytes(os.urandom(10), 'big')
+    # Set version (7) and RFC 4122 variant (0b10) bits
+    value = (value & ~(0xF << 76) & ~(0x3 << 62)) | (0x7 << 76) | (0x2 << 62)
+    h = '%032x' % value
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 
 class LineageDatabase:
     """Manages SQLite database for lineage tracking."""
     
+    # Statement text is kept constant so SQLite's statement cache can
+    # reuse the prepared plan across calls
+    _SQL_FIND_DATASET = """
+        SELECT id FROM datasets WHERE hash = ? AND filepath = ? LIMIT 1
+    """
+    _SQL_ADD_DATASET = """
+        INSERT INTO datasets (id, filepath, hash, size, format, metadata)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    _SQL_ADD_OPERATION = """
+        INSERT INTO operations (id, operation_type, function_name, code_snippet, parameters)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    _SQL_ADD_LINEAGE = """
+        INSERT INTO lineage (id, source_id, target_id, operation_id, relationship_type)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    _SQL_START_RUN = """
+        INSERT INTO runs (id, script_path, start_time, status)
+        VALUES (?, ?, ?, ?)
+    """
+    _SQL_END_RUN = """
+        UPDATE runs 
+        SET end_time = ?, status = ?
+        WHERE id = ?
+    """
+    # Whole-table reads and row counts
+    _SQL_ALL_DATASETS = "SELECT * FROM datasets ORDER BY created_at DESC LIMIT ?"
+    _SQL_ALL_OPERATIONS = "SELECT * FROM operations ORDER BY executed_at DESC"
+    _SQL_COUNTS = """
+        SELECT
+            (SELECT COUNT(*) FROM datasets),
+            (SELECT COUNT(*) FROM operations),
+            (SELECT COUNT(*) FROM lineage)
+    """
+    # Sources/sinks by file path, matching the edges of get_lineage_graph
+    _SQL_EDGES_CTE = """
+        WITH edges AS (
+            SELECT d1.filepath AS source, d2.filepath AS target
+            FROM lineage l
+            JOIN datasets d1 ON l.source_id = d1.id
+            JOIN datasets d2 ON l.target_id = d2.id
+            JOIN operations o ON l.operation_id = o.id
+        )
+    """
+    _SQL_PURE_SOURCES = "SELECT source FROM edges EXCEPT SELECT target FROM edges"
+    _SQL_PURE_SINKS = "SELECT target FROM edges EXCEPT SELECT source FROM edges"
+    _SQL_SOURCE_SINK_COUNTS = f"""{_SQL_EDGES_CTE}
+        SELECT
+            (SELECT COUNT(*) FROM ({_SQL_PURE_SOURCES})),
+            (SELECT COUNT(*) FROM ({_SQL_PURE_SINKS}))
+    """
+    # Lineage edges joined with dataset paths and operation names
+    _SQL_LINEAGE_GRAPH = """
+        SELECT 
+            d1.filepath as source,
+            d2.filepath as target,
+            o.function_name as operation,
+            o.operation_type,
+            l.created_at
+        FROM lineage l
+        JOIN datasets d1 ON l.source_id = d1.id
+        JOIN datasets d2 ON l.target_id = d2.id
+        JOIN operations o ON l.operation_id = o.id
+        ORDER BY l.created_at
+    """
+    _SQL_LINEAGE_GRAPH_LIMIT = _SQL_LINEAGE_GRAPH + " LIMIT ?"
+    # "source → target (operation)" lines with basenames, built by SQLite.
+    # rtrim() strips the file name, leaving the directory prefix to remove.
+    _SQL_EDGE_DESCRIPTIONS = """
+        WITH edges AS (
+            SELECT
+                replace(d1.filepath, '\\', '/') AS source,
+                replace(d2.filepath, '\\', '/') AS target,
+                coalesce(o.function_name, o.operation_type) AS operation,
+                l.created_at,
+                l.rowid AS seq
+            FROM lineage l
+            JOIN datasets d1 ON l.source_id = d1.id
+            JOIN datasets d2 ON l.target_id = d2.id
+            JOIN operations o ON l.operation_id = o.id
+        )
+        SELECT
+            replace(source, rtrim(source, replace(source, '/', '')), '')
+            || ' → ' ||
+            replace(target, rtrim(target, replace(target, '/', '')), '')
+            || ' (' || operation || ')'
+        FROM edges
+        ORDER BY created_at, seq
+    """
+    
     def __init__(self, db_path: str = "lineage.db"):
         """
         Initialize database connection.
@@ -21,11 +194,34 @@ class LineageDatabase:
             db_path: Path to SQLite database file
         """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        # Autocommit mode: transactions are only opened by begin_batch().
+        # Cross-thread use is allowed: the get_* readers each open their
+        # own cursor, and writers serialize on the tracker's lock.
+        self.conn = sqlite3.connect(
+            db_path, isolation_level=None, check_same_thread=False
+        )
         self.conn.row_factory = sqlite3.Row  # Return rows as dicts
         self.cursor = self.conn.cursor()
+        self._in_batch = False  # Defer commits while a batch is open
+        self._configure_connection()
         self._create_tables()
     
+    def _configure_connection(self):
+        """Apply performance PRAGMAs to the connection."""
+        try:
+            # WAL lets readers run alongside the writer and avoids
+            # rewriting the rollback journal on every commit
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass  # Read-only or unsupported filesystem: keep default journal
+        
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+        # Read pages straight from a 256 MiB memory map instead of read()
+        # syscalls; reports and graph builds scan whole tables
+        self.conn.execute("PRAGMA mmap_size=268435456")
+    
     def _create_tables(self):
         """Create database schema if it doesn't exist."""
         
@@ -93,7 +289,46 @@ class LineageDatabase:
             )
         """)
         
-        self.conn.commit()
+        # Layout cache - node positions keyed by graph structure hash
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS layout_cache (
+                graph_hash TEXT PRIMARY KEY,
+                positions TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Hash cache - file hashes keyed by stat signature, so unchanged
+        # files aren't re-hashed on later runs
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS hash_cache (
+                filepath TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            )
+        """)
+        
+        self.create_indexes()
+    
+    def create_indexes(self):
+        """Create secondary indexes if they don't exist."""
+        for name, target in _INDEXES:
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        self._commit()
+    
+    def drop_indexes(self):
+        """
+        Drop secondary indexes.
+        
+        Useful before a large bulk ingest; call create_indexes()
+        afterwards to rebuild them in one pass.
+        """
+        for name, _ in _INDEXES:
+            self.cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        self._commit()
     
     def add_dataset(
         self, 
@@ -114,20 +349,25 @@ class LineageDatabase:
             metadata: Additional metadata as dict
             
         Returns:
-            Dataset ID (UUID)
+            Dataset ID (UUID). If the same file with the same hash is
+            already recorded, the existing ID is returned instead.
         """
-        dataset_id = str(uuid.uuid4())
+        self.cursor.execute(self._SQL_FIND_DATASET, (file_hash, filepath))
+        existing = self.cursor.fetchone()
+        if existing:
+            return existing[0]
+        
+        dataset_id = _new_id()
         
         # Convert metadata dict to JSON string
-        import json
-        metadata_json = json.dumps(metadata) if metadata else None
+        metadata_json = _to_json(metadata)
         
-        self.cursor.execute("""
-            INSERT INTO datasets (id, filepath, hash, size, format, metadata)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (dataset_id, filepath, file_hash, size, file_format, metadata_json))
+        self.cursor.execute(
+            self._SQL_ADD_DATASET,
+            (dataset_id, filepath, file_hash, size, file_format, metadata_json)
+        )
         
-        self.conn.commit()
+        self._commit()
         return dataset_id
     
     def add_operation(
@@ -149,17 +389,16 @@ class LineageDatabase:
         Returns:
             Operation ID (UUID)
         """
-        operation_id = str(uuid.uuid4())
+        operation_id = _new_id()
         
-        import json
-        params_json = json.dumps(parameters) if parameters else None
+        params_json = _to_json(parameters)
         
-        self.cursor.execute("""
-            INSERT INTO operations (id, operation_type, function_name, code_snippet, parameters)
-            VALUES (?, ?, ?, ?, ?)
-        """, (operation_id, operation_type, function_name, code_snippet, params_json))
+        self.cursor.execute(
+            self._SQL_ADD_OPERATION,
+            (operation_id, operation_type, function_name, code_snippet, params_json)
+        )
         
-        self.conn.commit()
+        self._commit()
         return operation_id
     
     def add_lineage(
@@ -181,16 +420,126 @@ class LineageDatabase:
         Returns:
             Lineage ID (UUID)
         """
-        lineage_id = str(uuid.uuid4())
+        lineage_id = _new_id()
         
-        self.cursor.execute("""
-            INSERT INTO lineage (id, source_id, target_id, operation_id, relationship_type)
-            VALUES (?, ?, ?, ?, ?)
-        """, (lineage_id, source_id, target_id, operation_id, relationship_type))
+        self.cursor.execute(
+            self._SQL_ADD_LINEAGE,
+            (lineage_id, source_id, target_id, operation_id, relationship_type)
+        )
         
-        self.conn.commit()
+        self._commit()
         return lineage_id
     
+    def add_datasets_bulk(self, rows) -> List[str]:
+        """
+        Add many datasets with a single executemany.
+        
+        Args:
+            rows: Iterable of (filepath, file_hash, size, file_format, metadata)
+            
+        Returns:
+            List of dataset IDs, in input order
+        """
+        params = [
+            (_new_id(), filepath, file_hash, size, file_format, _to_json(metadata))
+            for filepath, file_hash, size, file_format, metadata in rows
+        ]
+        
+        self.cursor.executemany(self._SQL_ADD_DATASET, params)
+        
+        self._commit()
+        return [row[0] for row in params]
+    
+    def add_operations_bulk(self, rows) -> List[str]:
+        """
+        Add many operations with a single executemany.
+        
+        Args:
+            rows: Iterable of (operation_type, function_name, code_snippet, parameters)
+            
+        Returns:
+            List of operation IDs, in input order
+        """
+        params = [
+            (_new_id(), operation_type, function_name, code_snippet, _to_json(parameters))
+            for operation_type, function_name, code_snippet, parameters in rows
+        ]
+        
+        self.cursor.executemany(self._SQL_ADD_OPERATION, params)
+        
+        self._commit()
+        return [row[0] for row in params]
+    
+    def add_lineage_bulk(self, rows, relationship_type: str = "derived_from") -> List[str]:
+        """
+        Add many lineage relationships with a single executemany.
+        
+        Args:
+            rows: Iterable of (source_id, target_id, operation_id)
+            relationship_type: Type of relationship for every row
+            
+        Returns:
+            List of lineage IDs, in input order
+        """
+        params = [
+            (_new_id(), source_id, target_id, operation_id, relationship_type)
+            for source_id, target_id, operation_id in rows
+        ]
+        
+        self.cursor.executemany(self._SQL_ADD_LINEAGE, params)
+        
+        self._commit()
+        return [row[0] for row in params]
+    
+    def begin_batch(self):
+        """
+        Start a batch: subsequent writes share one transaction.
+        
+        Commits are deferred until end_batch() is called.
+        """
+        if self._in_batch:
+            return
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.cursor.execute("BEGIN")
+        self._in_batch = True
+    
+    def end_batch(self):
+        """Commit all writes made since begin_batch()."""
+        self._in_batch = False
+        self.conn.commit()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Context manager wrapping begin_batch()/end_batch().
+        
+        Usage:
+            with db.batch():
+                op_id = db.add_operation(...)
+                db.add_lineage_bulk(...)
+        
+        Rows of one kind are best written with the *_bulk methods, which
+        bind a single prepared statement through executemany. The
+        transaction is rolled back if the block raises.
+        """
+        if self._in_batch:
+            yield self
+            return
+        self.begin_batch()
+        try:
+            yield self
+        except BaseException:
+            self._in_batch = False
+            self.conn.rollback()
+            raise
+        self.end_batch()
+    
+    def _commit(self):
+        """Commit unless a batch is open."""
+        if not self._in_batch:
+            self.conn.commit()
+    
     def start_run(self, script_path: str = None) -> str:
         """
         Start a new tracking run.
@@ -201,14 +550,14 @@ class LineageDatabase:
         Returns:
             Run ID (UUID)
         """
-        run_id = str(uuid.uuid4())
+        run_id = _new_id()
         
-        self.cursor.execute("""
-            INSERT INTO runs (id, script_path, start_time, status)
-            VALUES (?, ?, ?, ?)
-        """, (run_id, script_path, datetime.now(), "running"))
+        self.cursor.execute(
+            self._SQL_START_RUN,
+            (run_id, script_path, datetime.now(), "running")
+        )
         
-        self.conn.commit()
+        self._commit()
         return run_id
     
     def end_run(self, run_id: str, status: str = "completed"):
@@ -219,48 +568,268 @@ class LineageDatabase:
             run_id: Run ID
             status: Final status (completed, failed, etc.)
         """
-        self.cursor.execute("""
-            UPDATE runs 
-            SET end_time = ?, status = ?
-            WHERE id = ?
-        """, (datetime.now(), status, run_id))
+        self.cursor.execute(self._SQL_END_RUN, (datetime.now(), status, run_id))
         
-        self.conn.commit()
+        self._commit()
     
-    def get_all_datasets(self):
-        """Get all datasets from database."""
-        self.cursor.execute("SELECT * FROM datasets ORDER BY created_at DESC")
-        return self.cursor.fetchall()
+    def get_all_datasets(self, limit: Optional[int] = None):
+        """
+        Get all datasets from database.
+        
+        Args:
+            limit: Optional maximum number of rows (newest first)
+        """
+        # LIMIT -1 means no limit in SQLite: one statement for both cases
+        cursor = self.conn.execute(
+            self._SQL_ALL_DATASETS, (limit if limit is not None else -1,)
+        )
+        return cursor.fetchall()
     
     def get_all_operations(self):
         """Get all operations from database."""
-        self.cursor.execute("SELECT * FROM operations ORDER BY executed_at DESC")
-        return self.cursor.fetchall()
+        cursor = self.conn.execute(self._SQL_ALL_OPERATIONS)
+        return cursor.fetchall()
     
-    def get_lineage_graph(self):
+    def get_lineage_graph(self, limit: Optional[int] = None):
         """
         Get full lineage graph as edges.
         
+        Args:
+            limit: Optional maximum number of edges (oldest first)
+        
         Returns:
             List of (source, target, operation) tuples
         """
-        self.cursor.execute("""
-            SELECT 
-                d1.filepath as source,
-                d2.filepath as target,
-                o.function_name as operation,
-                o.operation_type,
-                l.created_at
-            FROM lineage l
-            JOIN datasets d1 ON l.source_id = d1.id
-            JOIN datasets d2 ON l.target_id = d2.id
-            JOIN operations o ON l.operation_id = o.id
-            ORDER BY l.created_at
+        cursor = self.conn.execute(
+            self._SQL_LINEAGE_GRAPH_LIMIT, (limit if limit is not None else -1,)
+        )
+        return cursor.fetchall()
+    
+    def get_counts(self) -> Dict[str, int]:
+        """
+        Count datasets, operations and lineage edges in one query.
+        
+        Returns:
+            Dictionary with 'datasets', 'operations' and 'lineage' counts
+        """
+        cursor = self.conn.execute(self._SQL_COUNTS)
+        datasets, operations, lineage = cursor.fetchone()
+        return {'datasets': datasets, 'operations': operations, 'lineage': lineage}
+    
+    def get_source_sink_counts(self) -> tuple:
+        """
+        Count source files (never a lineage target) and sink files
+        (never a lineage source).
+        
+        Returns:
+            (source count, sink count) tuple
+        """
+        cursor = self.conn.execute(self._SQL_SOURCE_SINK_COUNTS)
+        return tuple(cursor.fetchone())
+    
+    def get_pure_sources(self) -> List[str]:
+        """
+        Get files that feed the lineage but are never produced by it.
+        
+        Returns:
+            Sorted list of file paths
+        """
+        cursor = self.conn.execute(self._SQL_EDGES_CTE + self._SQL_PURE_SOURCES + " ORDER BY 1")
+        return [row[0] for row in cursor.fetchall()]
+    
+    def get_pure_sinks(self) -> List[str]:
+        """
+        Get files produced by the lineage but never consumed.
+        
+        Returns:
+            Sorted list of file paths
+        """
+        cursor = self.conn.execute(self._SQL_EDGES_CTE + self._SQL_PURE_SINKS + " ORDER BY 1")
+        return [row[0] for row in cursor.fetchall()]
+    
+    def get_lineage_graph_iter(self, batch: int = 5000):
+        """
+        Stream lineage edges as plain tuples.
+        
+        Skips the sqlite3.Row factory and fetches in batches, so large
+        graphs are never fully materialized as Row objects.
+        
+        Args:
+            batch: Number of rows fetched per round trip
+            
+        Yields:
+            (source, target, operation, operation_type, created_at) tuples
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(self._SQL_LINEAGE_GRAPH)
+        
+        rows = cursor.fetchmany(batch)
+        while rows:
+            yield from rows
+            rows = cursor.fetchmany(batch)
+    
+    def iter_edge_descriptions(self, batch: int = 5000):
+        """
+        Stream lineage edges as printable "source → target (operation)" lines.
+        
+        File names and formatting come from SQLite, so no Python object
+        is built per edge beyond the line itself.
+        
+        Args:
+            batch: Number of rows fetched per round trip
+            
+        Yields:
+            One string per edge, in creation order
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(self._SQL_EDGE_DESCRIPTIONS)
+        
+        rows = cursor.fetchmany(batch)
+        while rows:
+            for (line,) in rows:
+                yield line
+            rows = cursor.fetchmany(batch)
+    
+    def get_lineage_version(self):
+        """
+        Get a cheap version stamp for the lineage table.
+        
+        The stamp changes whenever lineage edges are added or removed,
+        so callers can tell whether derived results are stale.
+        
+        Returns:
+            (row count, max rowid) tuple
+        """
+        cursor = self.conn.execute("SELECT COUNT(*), MAX(rowid) FROM lineage")
+        return tuple(cursor.fetchone())
+    
+    def get_data_version(self):
+        """
+        Get a cheap version stamp for datasets, operations and lineage.
+        
+        Like get_lineage_version(), but changes when any of the three
+        tables gains or loses rows.
+        
+        Returns:
+            Tuple of (row count, max rowid) per table
+        """
+        cursor = self.conn.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM datasets), (SELECT MAX(rowid) FROM datasets),
+                (SELECT COUNT(*) FROM operations), (SELECT MAX(rowid) FROM operations),
+                (SELECT COUNT(*) FROM lineage), (SELECT MAX(rowid) FROM lineage)
         """)
-        return self.cursor.fetchall()
+        return tuple(cursor.fetchone())
+    
+    def get_cached_layout(self, graph_hash: str) -> Optional[Dict[str, tuple]]:
+        """
+        Load node positions saved for a graph.
+        
+        Args:
+            graph_hash: Hash of the graph structure
+            
+        Returns:
+            Dictionary mapping node to (x, y), or None if not cached
+        """
+        cursor = self.conn.execute(
+            "SELECT positions FROM layout_cache WHERE graph_hash = ?",
+            (graph_hash,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        return {node: tuple(xy) for node, xy in json.loads(row[0]).items()}
+    
+    def save_layout(self, graph_hash: str, positions: Dict[str, Any]):
+        """
+        Save node positions for a graph.
+        
+        Only the latest _LAYOUT_CACHE_SIZE layouts are kept.
+        
+        Args:
+            graph_hash: Hash of the graph structure
+            positions: Dictionary mapping node to (x, y)
+        """
+        positions_json = json.dumps(
+            {node: [float(x), float(y)] for node, (x, y) in positions.items()}
+        )
+        
+        # REPLACE gives the row a new rowid, so rowid order is save order
+        self.conn.execute("""
+            INSERT OR REPLACE INTO layout_cache (graph_hash, positions)
+            VALUES (?, ?)
+        """, (graph_hash, positions_json))
+        self.conn.execute("""
+            DELETE FROM layout_cache
+            WHERE rowid <= (SELECT MAX(rowid) FROM layout_cache) - ?
+        """, (_LAYOUT_CACHE_SIZE,))
+        
+        self._commit()
+    
+    def get_cached_hash(
+        self,
+        filepath: str,
+        inode: int,
+        device: int,
+        mtime_ns: int,
+        size: int
+    ) -> Optional[str]:
+        """
+        Look up the stored hash of a file.
+        
+        Args:
+            filepath: Absolute path to file
+            inode: st_ino of the file
+            device: st_dev of the file
+            mtime_ns: st_mtime_ns of the file
+            size: st_size of the file
+            
+        Returns:
+            File hash, or None if the file is unknown or has changed
+        """
+        cursor = self.conn.execute(
+            "SELECT hash FROM hash_cache WHERE filepath = ? "
+            "AND inode = ? AND device = ? AND mtime_ns = ? AND size = ?",
+            (filepath, inode, device, mtime_ns, size)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def save_hash(
+        self,
+        filepath: str,
+        inode: int,
+        device: int,
+        mtime_ns: int,
+        size: int,
+        file_hash: str
+    ):
+        """
+        Store the hash of a file with its stat signature.
+        
+        Args:
+            filepath: Absolute path to file
+            inode: st_ino of the file
+            device: st_dev of the file
+            mtime_ns: st_mtime_ns of the file
+            size: st_size of the file
+            file_hash: Hash of the file contents
+        """
+        self.cursor.execute("""
+            INSERT OR REPLACE INTO hash_cache
+            (filepath, inode, device, mtime_ns, size, hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (filepath, inode, device, mtime_ns, size, file_hash))
+        
+        self._commit()
     
     def close(self):
         """Close database connection."""
+        if self._in_batch:
+            self.end_batch()
         self.conn.close()
     
     def __enter__(self):
@@ -2,61 +2,223 @@
 Graph generation and visualization for lineage data.
 """
 
-import networkx as nx
-import matplotlib.pyplot as plt
-from pathlib import Path
+import hashlib
+import json
+import logging
+from contextlib import nullcontext
 from typing import Optional, Dict, List
 import os
 
+logger = logging.getLogger(__name__)
+
+
+# Node colors by file extension
+_COLOR_MAP = {
+    '.csv': '#4CAF50',      # Green
+    '.parquet': '#2196F3',  # Blue
+    '.json': '#FF9800',     # Orange
+    '.pkl': '#9C27B0',      # Purple
+    '.pickle': '#9C27B0',
+    '.npy': '#F44336',      # Red
+    '.txt': '#795548',      # Brown
+    '.xlsx': '#00BCD4',     # Cyan
+    '.xls': '#00BCD4',
+}
+_DEFAULT_COLOR = '#9E9E9E'  # Gray
+
 
 class LineageGraph:
     """Generate and visualize lineage graphs."""
     
-    def __init__(self, db):
+    def __init__(self, db, use_cache: bool = False, lock=None):
         """
         Initialize graph generator.
         
         Args:
             db: LineageDatabase instance
+            use_cache: Keep a JSON edge-list cache next to the database
+                file, so repeated builds of an unchanged lineage skip
+                the SQL joins
+            lock: Lock held while saving layouts to db, e.g. the lock
+                of a tracker sharing the connection
         """
+        import networkx as nx
+        
         self.db = db
+        self.use_cache = use_cache
+        self._lock = lock if lock is not None else nullcontext()
         self.graph = nx.DiGraph()
         self._built = False
+        self._pos = None  # Cached node positions, reset on build()
+        self._build_key = None  # (run_id, lineage version) of last build
+        self._node_colors = {}  # node -> color, precomputed on build()
     
     def build(self, run_id: Optional[str] = None):
         """
         Build lineage graph from database.
         
+        Skipped when the graph was already built for the same run and
+        no lineage has been recorded since.
+        
         Args:
             run_id: Optional run ID to filter by
         """
+        build_key = (run_id, self.db.get_lineage_version())
+        if self._built and build_key == self._build_key:
+            return
+        
         self.graph.clear()
+        self._pos = None
+        self._node_colors = {}
+        self._built = False
         
-        # Get lineage data
-        edges = self.db.get_lineage_graph()
+        if self.use_cache:
+            # A deleted and recreated database can repeat the lineage
+            # version, so the cache is also tied to the database file
+            version = [*self._db_identity(), *build_key[1]]
+            edges = self._load_cached_edges(version)
+        else:
+            edges = None
+        
+        if edges is None:
+            # Stream lineage rows as plain tuples
+            edges = self.db.get_lineage_graph_iter()
+            if self.use_cache:
+                edges = list(edges)
+                self._save_cached_edges(version, edges)
+        
+        # Add nodes and edges (with metadata) in one call
+        self.graph.add_edges_from(
+            (
+                os.path.basename(source),  # Just filename
+                os.path.basename(target),
+                {
+                    'operation': operation or 'unknown',
+                    'type': op_type,
+                    'timestamp': created_at,
+                },
+            )
+            for source, target, operation, op_type, created_at in edges
+        )
         
-        if not edges:
-            print("⚠ No lineage data found")
+        if self.graph.number_of_edges() == 0:
+            logger.warning("⚠ No lineage data found")
             return
         
-        # Add nodes and edges
-        for edge in edges:
-            source = Path(edge['source']).name  # Just filename
-            target = Path(edge['target']).name
-            operation = edge['operation'] or 'unknown'
-            op_type = edge['operation_type']
+        self._built = True
+        self._build_key = build_key
+        self._node_colors = {
+            node: _COLOR_MAP.get(os.path.splitext(node)[1].lower(), _DEFAULT_COLOR)
+            for node in self.graph.nodes()
+        }
+        logger.debug(
+            "✓ Graph built: %d nodes, %d edges",
+            self.graph.number_of_nodes(),
+            self.graph.number_of_edges()
+        )
+    
+    def _edge_cache_path(self) -> Optional[str]:
+        """Path of the on-disk edge-list cache, None for in-memory DBs."""
+        db_path = getattr(self.db, 'db_path', None)
+        if not db_path or db_path == ':memory:':
+            return None
+        return f"{db_path}.lineage_cache.json"
+    
+    def _db_identity(self) -> tuple:
+        """
+        Identify the database file by inode and modification time.
+        
+        Returns:
+            (st_ino, st_mtime_ns) tuple, or () if the file can't be stat'ed
+        """
+        try:
+            stat = os.stat(self.db.db_path)
+        except (AttributeError, OSError, ValueError):
+            return ()
+        return (stat.st_ino, stat.st_mtime_ns)
+    
+    def _load_cached_edges(self, version) -> Optional[List]:
+        """
+        Load cached edge rows if they match the database and its lineage.
+        
+        Args:
+            version: Database identity followed by the lineage version
             
-            # Add edge with metadata
-            self.graph.add_edge(
-                source, 
-                target,
-                operation=operation,
-                type=op_type,
-                timestamp=edge['created_at']
-            )
+        Returns:
+            List of edge rows, or None if missing or stale
+        """
+        cache_path = self._edge_cache_path()
+        if cache_path is None:
+            return None
         
-        self._built = True
-        print(f"✓ Graph built: {self.graph.number_of_nodes()} nodes, {self.graph.number_of_edges()} edges")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if cached.get('version') != version:
+            return None
+        return cached.get('edges')
+    
+    def _save_cached_edges(self, version, edges: List):
+        """
+        Write edge rows to the on-disk cache.
+        
+        Args:
+            version: Database identity and lineage version the rows
+                were read at
+            edges: List of (source, target, operation, type, created_at)
+        """
+        cache_path = self._edge_cache_path()
+        if cache_path is None:
+            return
+        
+        tmp_path = cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': version, 'edges': edges}, f)
+            os.replace(tmp_path, cache_path)  # Atomic swap
+        except OSError as e:
+            logger.debug("Could not write edge cache %s: %s", cache_path, e)
+    
+    def get_layout(self) -> Dict:
+        """
+        Get node positions, computed once per build.
+        
+        Uses Graphviz's layered ``dot`` layout when pygraphviz and the
+        ``dot`` program work (fast and suited to DAGs), otherwise falls back to
+        NetworkX's spring layout. Positions are persisted in the
+        database, so an unchanged graph is laid out only once.
+        
+        Returns:
+            Dictionary mapping node to (x, y)
+        """
+        if self._pos is not None:
+            return self._pos
+        
+        import networkx as nx
+        
+        graph_hash = self._graph_hash()
+        self._pos = self.db.get_cached_layout(graph_hash)
+        
+        if self._pos is None:
+            try:
+                self._pos = nx.nx_agraph.graphviz_layout(self.graph, prog='dot')
+            except (ImportError, OSError, ValueError):
+                # No pygraphviz, or its dot program is missing or broken
+                self._pos = nx.spring_layout(self.graph, k=2, iterations=50)
+            with self._lock:
+                self.db.save_layout(graph_hash, self._pos)
+        
+        return self._pos
+    
+    def _graph_hash(self) -> str:
+        """Hash the graph structure (sorted edge list)."""
+        digest = hashlib.blake2b(digest_size=16)
+        for source, target in sorted(self.graph.edges()):
+            digest.update(f"{source}\0{target}\n".encode('utf-8'))
+        return digest.hexdigest()
     
     def get_node_color(self, node: str) -> str:
         """
@@ -68,21 +230,10 @@ class LineageGraph:
         Returns:
             Color string
         """
-        ext = Path(node).suffix.lower()
-        
-        color_map = {
-            '.csv': '#4CAF50',      # Green
-            '.parquet': '#2196F3',  # Blue
-            '.json': '#FF9800',     # Orange
-            '.pkl': '#9C27B0',      # Purple
-            '.pickle': '#9C27B0',
-            '.npy': '#F44336',      # Red
-            '.txt': '#795548',      # Brown
-            '.xlsx': '#00BCD4',     # Cyan
-            '.xls': '#00BCD4',
-        }
-        
-        return color_map.get(ext, '#9E9E9E')  # Gray default
+        color = self._node_colors.get(node)
+        if color is None:
+            color = _COLOR_MAP.get(os.path.splitext(node)[1].lower(), _DEFAULT_COLOR)
+        return color
     
     def visualize_matplotlib(
         self, 
@@ -102,22 +253,21 @@ class LineageGraph:
             self.build()
         
         if self.graph.number_of_nodes() == 0:
-            print("⚠ Empty graph, nothing to visualize")
+            logger.warning("⚠ Empty graph, nothing to visualize")
             return
         
+        # Imported lazily: matplotlib dominates package import time
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        
         # Create figure
         fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
         
-        # Layout
-        try:
-            # Try hierarchical layout (works well for DAGs)
-            pos = nx.spring_layout(self.graph, k=2, iterations=50)
-        except:
-            # Fallback to spring layout
-            pos = nx.spring_layout(self.graph)
+        # Layout (hierarchical when Graphviz is available)
+        pos = self.get_layout()
         
         # Node colors based on file type
-        node_colors = [self.get_node_color(node) for node in self.graph.nodes()]
+        node_colors = [self._node_colors[node] for node in self.graph.nodes()]
         
         # Draw nodes
         nx.draw_networkx_nodes(
@@ -177,79 +327,82 @@ class LineageGraph:
         plt.savefig(output_path, bbox_inches='tight', dpi=dpi)
         plt.close()
         
-        print(f"✓ Graph saved to {output_path}")
+        logger.info("✓ Graph saved to %s", output_path)
         return output_path
     
-    def visualize_plotly(self, output_path: str = 'lineage_graph.html'):
+    def visualize_plotly(self, output_path: Optional[str] = 'lineage_graph.html'):
         """
         Create interactive visualization using Plotly.
         
         Args:
-            output_path: Path to save HTML file
+            output_path: Path to save HTML file. If None, nothing is
+                written and the HTML is returned instead.
+            
+        Returns:
+            output_path, or the HTML string when output_path is None
         """
         try:
             import plotly.graph_objects as go
         except ImportError:
-            print("⚠ Plotly not installed. Install with: pip install plotly")
+            logger.warning("⚠ Plotly not installed. Install with: pip install plotly")
             return None
+        import numpy as np
         
         if not self._built:
             self.build()
         
         if self.graph.number_of_nodes() == 0:
-            print("⚠ Empty graph, nothing to visualize")
+            logger.warning("⚠ Empty graph, nothing to visualize")
             return
         
-        # Layout
-        pos = nx.spring_layout(self.graph, k=2, iterations=50)
-        
-        # Create edges
-        edge_x = []
-        edge_y = []
-        for edge in self.graph.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_x.append(x0)
-            edge_x.append(x1)
-            edge_x.append(None)
-            edge_y.append(y0)
-            edge_y.append(y1)
-            edge_y.append(None)
+        # Layout (shared with visualize_matplotlib)
+        pos = self.get_layout()
+        
+        # Node coordinates as one (N, 2) array; edges index into it
+        nodelist = list(self.graph.nodes())
+        node_index = {node: i for i, node in enumerate(nodelist)}
+        xy = np.array([pos[node] for node in nodelist], dtype=np.float64).reshape(-1, 2)
+        
+        num_edges = self.graph.number_of_edges()
+        src_idx = np.fromiter(
+            (node_index[u] for u, _ in self.graph.edges()), dtype=np.intp, count=num_edges
+        )
+        dst_idx = np.fromiter(
+            (node_index[v] for _, v in self.graph.edges()), dtype=np.intp, count=num_edges
+        )
+        
+        # Create edges: (x0, x1, NaN) triples per edge,
+        # the NaN breaks the line between segments
+        edge_x = np.full((num_edges, 3), np.nan)
+        edge_y = np.full((num_edges, 3), np.nan)
+        edge_x[:, 0] = xy[src_idx, 0]
+        edge_x[:, 1] = xy[dst_idx, 0]
+        edge_y[:, 0] = xy[src_idx, 1]
+        edge_y[:, 1] = xy[dst_idx, 1]
         
         edge_trace = go.Scatter(
-            x=edge_x, y=edge_y,
+            x=edge_x.ravel(), y=edge_y.ravel(),
             line=dict(width=2, color='#888'),
             hoverinfo='none',
             mode='lines'
         )
         
         # Create nodes
-        node_x = []
-        node_y = []
-        node_text = []
-        node_colors = []
-        
-        for node in self.graph.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            
-            # Node info
-            in_edges = list(self.graph.in_edges(node))
-            out_edges = list(self.graph.out_edges(node))
-            
-            text = f"{node}<br>"
-            text += f"Inputs: {len(in_edges)}<br>"
-            text += f"Outputs: {len(out_edges)}"
-            node_text.append(text)
-            
-            node_colors.append(self.get_node_color(node))
+        node_x = xy[:, 0]
+        node_y = xy[:, 1]
+        node_text = [
+            f"{node}<br>"
+            f"Inputs: {self.graph.in_degree(node)}<br>"
+            f"Outputs: {self.graph.out_degree(node)}"
+            for node in nodelist
+        ]
+        node_colors = [self._node_colors[node] for node in nodelist]
         
         node_trace = go.Scatter(
             x=node_x, y=node_y,
             mode='markers+text',
             hoverinfo='text',
-            text=[Path(n).name for n in self.graph.nodes()],
+            text=nodelist,  # Nodes are already file names
             textposition="top center",
             hovertext=node_text,
             marker=dict(
@@ -276,9 +429,12 @@ class LineageGraph:
             )
         )
         
+        if output_path is None:
+            return fig.to_html()
+        
         # Save
         fig.write_html(output_path)
-        print(f"✓ Interactive graph saved to {output_path}")
+        logger.info("✓ Interactive graph saved to %s", output_path)
         
         return output_path
     
@@ -321,13 +477,27 @@ class LineageGraph:
         Returns:
             Dictionary with graph metrics
         """
+        import networkx as nx
+        
         if not self._built:
             self.build()
         
+        # One pass over the raw adjacency dicts: an empty predecessor
+        # dict means in-degree 0, an empty successor dict out-degree 0
+        sources = []
+        sinks = []
+        pred = self.graph._pred
+        succ = self.graph._succ
+        for node in self.graph:
+            if not pred[node]:
+                sources.append(node)
+            if not succ[node]:
+                sinks.append(node)
+        
         return {
             'nodes': self.graph.number_of_nodes(),
             'edges': self.graph.number_of_edges(),
             'is_dag': nx.is_directed_acyclic_graph(self.graph),
-            'sources': [n for n in self.graph.nodes() if self.graph.in_degree(n) == 0],
-            'sinks': [n for n in self.graph.nodes() if self.graph.out_degree(n) == 0],
+            'sources': sources,
+            'sinks': sinks,
         }
\ No newline at end of file
@@ -3,428 +3,507 @@ Function hooks for automatic lineage tracking.
 Intercepts pandas, numpy, and scikit-learn functions.
 """
 
-import pandas as pd
-import numpy as np
-from functools import wraps
-import inspect
+import atexit
+import collections
+import contextvars
+import logging
 import os
-from typing import Callable, Any
+import pickle
+import sys
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+
+class _NullTracker:
+    """Stand-in tracker while tracking is off: track_file does nothing."""
+    
+    __slots__ = ()
+    
+    # Taken by flush_hooks like a real tracker's lock
+    _lock = threading.RLock()
+    
+    @staticmethod
+    def track_file(*args, **kwargs):
+        return None
+
+
+_NULL_TRACKER = _NullTracker()
+
+# Global tracker instance (will be set when hooks are enabled).
+# Never None, so wrappers can call it without checking first.
+_tracker = _NULL_TRACKER
 
-# Global tracker instance (will be set when hooks are enabled)
-_tracker = None
+# _tracker.track_file, resolved once per tracker change. Wrappers call
+# this directly: no global tracker lookup or None check per I/O call.
+_track_file = _NULL_TRACKER.track_file
+_tracker_lock = threading.Lock()
+
+
+def _bind_tracker(tracker):
+    """Publish tracker and its track_file together."""
+    global _tracker, _track_file
+    with _tracker_lock:
+        _tracker = tracker
+        _track_file = tracker.track_file
+
+
+# Per-thread/per-task override of the global tracker (see use_tracker).
+# Unset in new threads, which then fall back to the global tracker.
+_tracker_override = contextvars.ContextVar('autolineage_tracker', default=None)
 
 
 def set_tracker(tracker):
     """Set the global tracker instance."""
-    global _tracker
-    _tracker = tracker
+    _bind_tracker(tracker if tracker is not None else _NULL_TRACKER)
 
 
 def get_tracker():
-    """Get the global tracker instance."""
-    return _tracker
+    """Get the tracker for the current context, else the global one."""
+    tracker = _tracker_override.get()
+    if tracker is None:
+        tracker = _tracker
+    if tracker is _NULL_TRACKER:
+        return None
+    if type(tracker) is _DeferredTracker:
+        return tracker.tracker
+    return tracker
+
+
+@contextmanager
+def use_tracker(tracker):
+    """
+    Route hooked I/O in the current thread or asyncio task to tracker.
+    
+    Other threads and tasks keep using the global tracker, so
+    concurrent pipelines can record to separate databases. Events are
+    recorded synchronously, even when hooks run in deferred mode.
+    
+    Args:
+        tracker: DatasetTracker instance, or None to pause tracking
+            in this context
+    """
+    token = _tracker_override.set(tracker if tracker is not None else _NULL_TRACKER)
+    try:
+        yield tracker
+    finally:
+        _tracker_override.reset(token)
+
+
+# ============================================================
+# DEFERRED TRACKING
+# ============================================================
+
+# Events queued by wrappers in deferred mode:
+# (abs path, operation type, (function name, filename, line number))
+_events = collections.deque()
+_flush_lock = threading.Lock()  # One flusher at a time keeps event order
+_drain_thread = None
+_drain_stop = threading.Event()
+
+_DRAIN_INTERVAL = 0.05  # Seconds between background flushes
+_DRAIN_BATCH = 1024     # Max events written per transaction
+
+
+class _DeferredTracker:
+    """Tracker proxy that queues events instead of writing them."""
+    
+    __slots__ = ('tracker',)
+    
+    def __init__(self, tracker):
+        self.tracker = tracker
+    
+    def track_file(self, filepath, operation_type='read', metadata=None):
+        # Resolve now: the working directory may change before the flush,
+        # and the flush runs on another stack. Frame 2 is the code that
+        # called the hooked function (frame 1 is the wrapper).
+        frame = sys._getframe(2)
+        _events.append((
+            os.path.abspath(filepath),
+            operation_type,
+            (frame.f_code.co_name, frame.f_code.co_filename, frame.f_lineno),
+        ))
 
 
-# Store original functions before we replace them
-_original_functions = {}
+def _flush_target():
+    """The tracker queued events are recorded to (not the proxy)."""
+    # Events were queued for the global tracker, whatever the caller's
+    # context (see use_tracker)
+    tracker = _tracker
+    if type(tracker) is _DeferredTracker:
+        tracker = tracker.tracker
+    return tracker
+
+
+def _write_events(tracker):
+    """
+    Record queued events in batches.
+    
+    Callers hold tracker._lock, then _flush_lock: always in that order,
+    as code inside tracker.batch() already holds the tracker's lock when
+    it calls flush_hooks(). A batch that fails to record is put back.
+    """
+    while _events:
+        batch = []
+        while _events and len(batch) < _DRAIN_BATCH:
+            batch.append(_events.popleft())
+        if tracker is not _NULL_TRACKER:
+            try:
+                tracker.track_files_bulk(batch)
+            except BaseException:
+                _events.extendleft(reversed(batch))
+                raise
+
+
+def flush_hooks():
+    """
+    Record all queued tracking events now.
+    
+    Only needed in deferred mode (enable_hooks(defer=True)), e.g.
+    before reading results from the tracker.
+    """
+    tracker = _flush_target()
+    with tracker._lock, _flush_lock:
+        _write_events(tracker)
+
+
+def _drain_loop():
+    """Background thread body: flush queued events periodically."""
+    while not _drain_stop.wait(_DRAIN_INTERVAL):
+        if not _events:
+            continue
+        tracker = _flush_target()
+        # Don't wait for the tracker's lock: its holder may be waiting for
+        # this thread to stop (disable_hooks() inside tracker.batch()).
+        # The events are picked up on a later round.
+        if not tracker._lock.acquire(blocking=False):
+            continue
+        try:
+            with _flush_lock:
+                _write_events(tracker)
+        except Exception:
+            logger.exception("Could not record queued tracking events")
+        finally:
+            tracker._lock.release()
+
+
+def _start_drain_thread():
+    """Start the background flush thread (deferred mode)."""
+    global _drain_thread
+    _stop_drain_thread()
+    _drain_stop.clear()
+    _drain_thread = threading.Thread(
+        target=_drain_loop, name='autolineage-drain', daemon=True
+    )
+    _drain_thread.start()
+
+
+def _stop_drain_thread():
+    """Stop the background flush thread and record remaining events."""
+    global _drain_thread
+    if _drain_thread is not None:
+        _drain_stop.set()
+        _drain_thread.join()
+        _drain_thread = None
+    flush_hooks()
+
+
+def _flush_at_exit():
+    """Record events still queued at exit (the drain thread is a daemon)."""
+    try:
+        _stop_drain_thread()
+    except Exception as e:
+        # E.g. the tracker was closed with events still queued
+        logger.warning("Could not record %d queued tracking events: %s", len(_events), e)
+
+
+atexit.register(_flush_at_exit)
+
+
+# Store original functions before we replace them:
+# {module or class: {function name: original}}, keyed by object identity
+_original_functions = weakref.WeakKeyDictionary()
 
 
 def save_original(module, func_name):
     """Save original function before replacing."""
-    key = f"{module.__name__}.{func_name}"
-    if key not in _original_functions:
-        _original_functions[key] = getattr(module, func_name)
-    return _original_functions[key]
+    originals = _original_functions.setdefault(module, {})
+    if func_name not in originals:
+        originals[func_name] = getattr(module, func_name)
+    return originals[func_name]
 
 
 def get_original(module, func_name):
     """Get saved original function."""
-    key = f"{module.__name__}.{func_name}"
-    return _original_functions.get(key)
-
+    return _original_functions.get(module, {}).get(func_name)
 
-# ============================================================
-# PANDAS HOOKS
-# ============================================================
 
-def hook_pandas():
-    """Hook into pandas I/O functions."""
-    
-    # Save originals
-    _orig_read_csv = save_original(pd, 'read_csv')
-    _orig_read_parquet = save_original(pd, 'read_parquet')
-    _orig_read_json = save_original(pd, 'read_json')
-    _orig_read_excel = save_original(pd, 'read_excel')
-    _orig_read_pickle = save_original(pd, 'read_pickle')
-    
-    _orig_to_csv = save_original(pd.DataFrame, 'to_csv')
-    _orig_to_parquet = save_original(pd.DataFrame, 'to_parquet')
-    _orig_to_json = save_original(pd.DataFrame, 'to_json')
-    _orig_to_excel = save_original(pd.DataFrame, 'to_excel')
-    _orig_to_pickle = save_original(pd.DataFrame, 'to_pickle')
-    
-    # ===== READ FUNCTIONS =====
-    
-    @wraps(_orig_read_csv)
-    def tracked_read_csv(filepath_or_buffer, *args, **kwargs):
-        """Tracked version of pd.read_csv"""
-        # Call original function
-        result = _orig_read_csv(filepath_or_buffer, *args, **kwargs)
-        
-        # Track if tracker is available and filepath is a string
-        if _tracker and isinstance(filepath_or_buffer, str):
-            if os.path.exists(filepath_or_buffer):
-                _tracker.track_file(filepath_or_buffer, 'read')
-        
-        return result
-    
-    @wraps(_orig_read_parquet)
-    def tracked_read_parquet(path, *args, **kwargs):
-        """Tracked version of pd.read_parquet"""
-        result = _orig_read_parquet(path, *args, **kwargs)
-        
-        if _tracker and isinstance(path, str):
-            if os.path.exists(path):
-                _tracker.track_file(path, 'read')
-        
-        return result
-    
-    @wraps(_orig_read_json)
-    def tracked_read_json(path_or_buf, *args, **kwargs):
-        """Tracked version of pd.read_json"""
-        result = _orig_read_json(path_or_buf, *args, **kwargs)
-        
-        if _tracker and isinstance(path_or_buf, str):
-            if os.path.exists(path_or_buf):
-                _tracker.track_file(path_or_buf, 'read')
-        
-        return result
-    
-    @wraps(_orig_read_excel)
-    def tracked_read_excel(io, *args, **kwargs):
-        """Tracked version of pd.read_excel"""
-        result = _orig_read_excel(io, *args, **kwargs)
-        
-        if _tracker and isinstance(io, str):
-            if os.path.exists(io):
-                _tracker.track_file(io, 'read')
-        
-        return result
-    
-    @wraps(_orig_read_pickle)
-    def tracked_read_pickle(filepath_or_buffer, *args, **kwargs):
-        """Tracked version of pd.read_pickle"""
-        result = _orig_read_pickle(filepath_or_buffer, *args, **kwargs)
-        
-        if _tracker and isinstance(filepath_or_buffer, str):
-            if os.path.exists(filepath_or_buffer):
-                _tracker.track_file(filepath_or_buffer, 'read')
-        
-        return result
-    
-    # ===== WRITE FUNCTIONS =====
-    
-    @wraps(_orig_to_csv)
-    def tracked_to_csv(self, path_or_buf=None, *args, **kwargs):
-        """Tracked version of DataFrame.to_csv"""
-        # Call original
-        result = _orig_to_csv(self, path_or_buf, *args, **kwargs)
-        
-        # Track if tracker is available and path is a string
-        if _tracker and path_or_buf and isinstance(path_or_buf, str):
-            _tracker.track_file(path_or_buf, 'write')
-        
-        return result
-    
-    @wraps(_orig_to_parquet)
-    def tracked_to_parquet(self, path, *args, **kwargs):
-        """Tracked version of DataFrame.to_parquet"""
-        result = _orig_to_parquet(self, path, *args, **kwargs)
-        
-        if _tracker and isinstance(path, str):
-            _tracker.track_file(path, 'write')
-        
-        return result
+def _is_local_path(path: str) -> bool:
+    """
+    Cheap check that a string argument can name a local file.
     
-    @wraps(_orig_to_json)
-    def tracked_to_json(self, path_or_buf=None, *args, **kwargs):
-        """Tracked version of DataFrame.to_json"""
-        result = _orig_to_json(self, path_or_buf, *args, **kwargs)
-        
-        if _tracker and path_or_buf and isinstance(path_or_buf, str):
-            _tracker.track_file(path_or_buf, 'write')
-        
-        return result
+    Rejects remote paths (http://, s3://, ...) and literal data passed
+    in place of a path, e.g. pd.read_json('{"a": [1]}').
+    """
+    return '://' not in path and '\n' not in path and not path.startswith(('{', '['))
+
+
+def _make_tracked(orig, mode, arg_name, arg_pos=0, to_path=None):
+    """
+    Wrap an I/O function so successful calls are tracked.
     
-    @wraps(_orig_to_excel)
-    def tracked_to_excel(self, excel_writer, *args, **kwargs):
-        """Tracked version of DataFrame.to_excel"""
-        result = _orig_to_excel(self, excel_writer, *args, **kwargs)
-        
-        if _tracker and isinstance(excel_writer, str):
-            _tracker.track_file(excel_writer, 'write')
+    Args:
+        orig: Original function
+        mode: Operation type passed to track_file ('read' or 'write')
+        arg_name: Keyword name of the path argument
+        arg_pos: Positional index of the path argument
+            (1 for DataFrame methods, where 0 is self)
+        to_path: Optional callable mapping the argument to a file path
+        
+    Returns:
+        Tracked version of orig
+    """
+    @wraps(orig)
+    def tracked(*args, **kwargs):
+        result = orig(*args, **kwargs)
+        
+        if arg_name in kwargs:
+            path = kwargs[arg_name]
+        else:
+            path = args[arg_pos] if len(args) > arg_pos else None
+        if to_path is not None:
+            path = to_path(path)
+        if type(path) is not str:  # Pointer compare; plain str is the norm
+            # None (e.g. to_csv() returning a string) skips the slow path
+            path = _as_path(path) if path is not None else None
+        
+        # Track if path is a local file path (a no-op while tracking is
+        # off). An empty string is a no-op, as before. No exists() check:
+        # the call above already succeeded. Hashing right after the call
+        # reads the bytes it just moved through the page cache, not disk.
+        if path and _is_local_path(path):
+            if path[0] == '~':  # Expanded by pandas and numpy
+                path = os.path.expanduser(path)
+            tracker = _tracker_override.get()
+            if tracker is None:
+                _track_file(path, mode)
+            else:
+                tracker.track_file(path, mode)
         
         return result
     
-    @wraps(_orig_to_pickle)
-    def tracked_to_pickle(self, path, *args, **kwargs):
-        """Tracked version of DataFrame.to_pickle"""
-        result = _orig_to_pickle(self, path, *args, **kwargs)
-        
-        if _tracker and isinstance(path, str):
-            _tracker.track_file(path, 'write')
-        
-        return result
+    return tracked
+
+
+def _as_path(value):
+    """
+    Convert a path-like argument to str.
     
-    # Replace pandas functions with tracked versions
-    pd.read_csv = tracked_read_csv
-    pd.read_parquet = tracked_read_parquet
-    pd.read_json = tracked_read_json
-    pd.read_excel = tracked_read_excel
-    pd.read_pickle = tracked_read_pickle
+    Slow path for anything that isn't a plain str: str subclasses and
+    os.PathLike objects (pathlib.Path) are converted, buffers and file
+    objects give None.
+    """
+    if isinstance(value, (str, os.PathLike)):
+        path = os.fspath(value)
+        if isinstance(path, str):
+            return str(path)
+    return None
+
+
+def _npy_path(file):
+    """np.save adds the .npy extension automatically."""
+    if type(file) is not str:
+        file = _as_path(file)
+    if type(file) is str and file[-4:] != '.npy':
+        return file + '.npy'
+    return file
+
+
+def _file_name(file):
+    """Path of an open file object (pickle takes file handles)."""
+    return getattr(file, 'name', None)
+
+
+def _install(bindings):
+    """
+    Replace functions with tracked versions.
     
-    pd.DataFrame.to_csv = tracked_to_csv
-    pd.DataFrame.to_parquet = tracked_to_parquet
-    pd.DataFrame.to_json = tracked_to_json
-    pd.DataFrame.to_excel = tracked_to_excel
-    pd.DataFrame.to_pickle = tracked_to_pickle
+    Args:
+        bindings: (owner, attr, mode, arg_name, arg_pos, to_path) tuples;
+            the last four are passed to _make_tracked
+    """
+    for owner, attr, mode, arg_name, arg_pos, to_path in bindings:
+        orig = save_original(owner, attr)
+        setattr(owner, attr, _make_tracked(orig, mode, arg_name, arg_pos, to_path))
+
+
+# ============================================================
+# PANDAS HOOKS
+# ============================================================
+
+def hook_pandas(verbose=True):
+    """Hook into pandas I/O functions."""
     
-    print("✓ Pandas hooks installed")
+    # Imported here so autolineage itself loads without pandas
+    import pandas as pd
+    
+    df = pd.DataFrame
+    _install((
+        (pd, 'read_csv', 'read', 'filepath_or_buffer', 0, None),
+        (pd, 'read_parquet', 'read', 'path', 0, None),
+        (pd, 'read_json', 'read', 'path_or_buf', 0, None),
+        (pd, 'read_excel', 'read', 'io', 0, None),
+        (pd, 'read_pickle', 'read', 'filepath_or_buffer', 0, None),
+        
+        # DataFrame methods: position 0 is self
+        (df, 'to_csv', 'write', 'path_or_buf', 1, None),
+        (df, 'to_parquet', 'write', 'path', 1, None),
+        (df, 'to_json', 'write', 'path_or_buf', 1, None),
+        (df, 'to_excel', 'write', 'excel_writer', 1, None),
+        (df, 'to_pickle', 'write', 'path', 1, None),
+    ))
+    
+    if verbose:
+        print("✓ Pandas hooks installed")
 
 
 # ============================================================
 # NUMPY HOOKS
 # ============================================================
 
-def hook_numpy():
+def hook_numpy(verbose=True):
     """Hook into numpy I/O functions."""
     
-    # Save originals
-    _orig_load = save_original(np, 'load')
-    _orig_save = save_original(np, 'save')
-    _orig_loadtxt = save_original(np, 'loadtxt')
-    _orig_savetxt = save_original(np, 'savetxt')
+    import numpy as np
     
-    @wraps(_orig_load)
-    def tracked_load(file, *args, **kwargs):
-        """Tracked version of np.load"""
-        result = _orig_load(file, *args, **kwargs)
-        
-        if _tracker and isinstance(file, str):
-            if os.path.exists(file):
-                _tracker.track_file(file, 'read')
-        
-        return result
-    
-    @wraps(_orig_save)
-    def tracked_save(file, arr, *args, **kwargs):
-        """Tracked version of np.save"""
-        result = _orig_save(file, arr, *args, **kwargs)
-        
-        if _tracker and isinstance(file, str):
-            # np.save adds .npy extension automatically
-            filepath = file if file.endswith('.npy') else f"{file}.npy"
-            _tracker.track_file(filepath, 'write')
-        
-        return result
+    _install((
+        (np, 'load', 'read', 'file', 0, None),
+        (np, 'save', 'write', 'file', 0, _npy_path),
+        (np, 'loadtxt', 'read', 'fname', 0, None),
+        (np, 'savetxt', 'write', 'fname', 0, None),
+    ))
     
-    @wraps(_orig_loadtxt)
-    def tracked_loadtxt(fname, *args, **kwargs):
-        """Tracked version of np.loadtxt"""
-        result = _orig_loadtxt(fname, *args, **kwargs)
-        
-        if _tracker and isinstance(fname, str):
-            if os.path.exists(fname):
-                _tracker.track_file(fname, 'read')
-        
-        return result
-    
-    @wraps(_orig_savetxt)
-    def tracked_savetxt(fname, X, *args, **kwargs):
-        """Tracked version of np.savetxt"""
-        result = _orig_savetxt(fname, X, *args, **kwargs)
-        
-        if _tracker and isinstance(fname, str):
-            _tracker.track_file(fname, 'write')
-        
-        return result
-    
-    # Replace numpy functions
-    np.load = tracked_load
-    np.save = tracked_save
-    np.loadtxt = tracked_loadtxt
-    np.savetxt = tracked_savetxt
-    
-    print("✓ NumPy hooks installed")
+    if verbose:
+        print("✓ NumPy hooks installed")
 
 
 # ============================================================
 # SCIKIT-LEARN HOOKS (Model Persistence)
 # ============================================================
 
-def hook_sklearn():
+def hook_sklearn(verbose=True):
     """Hook into scikit-learn model persistence."""
     
     try:
         import joblib
         
-        _orig_dump = save_original(joblib, 'dump')
-        _orig_load = save_original(joblib, 'load')
-        
-        @wraps(_orig_dump)
-        def tracked_dump(value, filename, *args, **kwargs):
-            """Tracked version of joblib.dump"""
-            result = _orig_dump(value, filename, *args, **kwargs)
-            
-            if _tracker and isinstance(filename, str):
-                _tracker.track_file(filename, 'write')
-            
-            return result
-        
-        @wraps(_orig_load)
-        def tracked_load(filename, *args, **kwargs):
-            """Tracked version of joblib.load"""
-            result = _orig_load(filename, *args, **kwargs)
-            
-            if _tracker and isinstance(filename, str):
-                if os.path.exists(filename):
-                    _tracker.track_file(filename, 'read')
-            
-            return result
+        _install((
+            (joblib, 'dump', 'write', 'filename', 1, None),
+            (joblib, 'load', 'read', 'filename', 0, None),
+        ))
         
-        joblib.dump = tracked_dump
-        joblib.load = tracked_load
-        
-        print("✓ Joblib hooks installed")
+        if verbose:
+            print("✓ Joblib hooks installed")
         
     except ImportError:
-        print("⚠ Joblib not installed, skipping sklearn hooks")
+        if verbose:
+            print("⚠ Joblib not installed, skipping sklearn hooks")
 
 
 # ============================================================
 # PICKLE HOOKS
 # ============================================================
 
-def hook_pickle():
+def hook_pickle(verbose=True):
     """Hook into Python's pickle module."""
     
-    import pickle
-    
-    _orig_dump = save_original(pickle, 'dump')
-    _orig_load = save_original(pickle, 'load')
+    # pickle works on file objects: track their .name
+    _install((
+        (pickle, 'dump', 'write', 'file', 1, _file_name),
+        (pickle, 'load', 'read', 'file', 0, _file_name),
+    ))
     
-    @wraps(_orig_dump)
-    def tracked_dump(obj, file, *args, **kwargs):
-        """Tracked version of pickle.dump"""
-        result = _orig_dump(obj, file, *args, **kwargs)
-        
-        # Track if file has a name attribute (file object)
-        if _tracker and hasattr(file, 'name'):
-            _tracker.track_file(file.name, 'write')
-        
-        return result
-    
-    @wraps(_orig_load)
-    def tracked_load(file, *args, **kwargs):
-        """Tracked version of pickle.load"""
-        result = _orig_load(file, *args, **kwargs)
-        
-        if _tracker and hasattr(file, 'name'):
-            _tracker.track_file(file.name, 'read')
-        
-        return result
-    
-    pickle.dump = tracked_dump
-    pickle.load = tracked_load
-    
-    print("✓ Pickle hooks installed")
+    if verbose:
+        print("✓ Pickle hooks installed")
 
 
 # ============================================================
 # ENABLE/DISABLE ALL HOOKS
 # ============================================================
 
-def enable_hooks(tracker=None):
+def enable_hooks(tracker=None, defer=False, verbose=True):
     """
     Enable all hooks for automatic tracking.
     
     Args:
         tracker: DatasetTracker instance. If None, creates a new one.
+        defer: Queue tracking events and write them from a background
+            thread in batches, keeping hashing and database writes off
+            the I/O call path. Call flush_hooks() before reading results.
+        verbose: Print the installation banner
     """
-    global _tracker
+    _stop_drain_thread()
     
-    if tracker:
-        _tracker = tracker
-    else:
+    if not tracker:
         from .tracker import DatasetTracker
-        _tracker = DatasetTracker()
-        _tracker.start_run()
+        tracker = DatasetTracker()
+        tracker.start_run()
+    
+    if defer:
+        _bind_tracker(_DeferredTracker(tracker))
+        _start_drain_thread()
+    else:
+        _bind_tracker(tracker)
     
-    print("\n" + "="*60)
-    print("AUTOLINEAGE: Enabling automatic tracking")
-    print("="*60)
+    if verbose:
+        print("\n" + "="*60)
+        print("AUTOLINEAGE: Enabling automatic tracking")
+        print("="*60)
     
-    hook_pandas()
-    hook_numpy()
-    hook_sklearn()
-    hook_pickle()
+    hook_pandas(verbose)
+    hook_numpy(verbose)
+    hook_sklearn(verbose)
+    hook_pickle(verbose)
     
-    print("="*60)
-    print("✅ All hooks enabled! Tracking is now automatic.")
-    print("="*60 + "\n")
+    if verbose:
+        print("="*60)
+        print("✅ All hooks enabled! Tracking is now automatic.")
+        print("="*60 + "\n")
     
-    return _tracker
+    return tracker
 
 
-def disable_hooks():
-    """Restore original functions."""
-    
-    print("\n" + "="*60)
-    print("AUTOLINEAGE: Disabling hooks")
-    print("="*60)
+def disable_hooks(verbose=True):
+    """
+    Restore original functions.
     
-    # Restore pandas
-    if 'pandas.read_csv' in _original_functions:
-        pd.read_csv = _original_functions['pandas.read_csv']
-        pd.read_parquet = _original_functions['pandas.read_parquet']
-        pd.read_json = _original_functions['pandas.read_json']
-        pd.read_excel = _original_functions['pandas.read_excel']
-        pd.read_pickle = _original_functions['pandas.read_pickle']
-        
-        pd.DataFrame.to_csv = _original_functions['pandas.core.frame.DataFrame.to_csv']
-        pd.DataFrame.to_parquet = _original_functions['pandas.core.frame.DataFrame.to_parquet']
-        pd.DataFrame.to_json = _original_functions['pandas.core.frame.DataFrame.to_json']
-        pd.DataFrame.to_excel = _original_functions['pandas.core.frame.DataFrame.to_excel']
-        pd.DataFrame.to_pickle = _original_functions['pandas.core.frame.DataFrame.to_pickle']
-        
-        print("✓ Pandas hooks removed")
-    
-    # Restore numpy
-    if 'numpy.load' in _original_functions:
-        np.load = _original_functions['numpy.load']
-        np.save = _original_functions['numpy.save']
-        np.loadtxt = _original_functions['numpy.loadtxt']
-        np.savetxt = _original_functions['numpy.savetxt']
-        
-        print("✓ NumPy hooks removed")
+    Args:
+        verbose: Print the removal banner
+    """
     
-    # Restore joblib
-    try:
-        import joblib
-        if 'joblib.dump' in _original_functions:
-            joblib.dump = _original_functions['joblib.dump']
-            joblib.load = _original_functions['joblib.load']
-            print("✓ Joblib hooks removed")
-    except ImportError:
-        pass
-    
-    # Restore pickle
-    import pickle
-    if 'pickle.dump' in _original_functions:
-        pickle.dump = _original_functions['pickle.dump']
-        pickle.load = _original_functions['pickle.load']
-        print("✓ Pickle hooks removed")
-    
-    print("="*60)
-    print("✅ All hooks disabled")
-    print("="*60 + "\n")
\ No newline at end of file
+    # Record anything still queued in deferred mode
+    _stop_drain_thread()
+    
+    if verbose:
+        print("\n" + "="*60)
+        print("AUTOLINEAGE: Disabling hooks")
+        print("="*60)
+    
+    restored = 0
+    for module, originals in list(_original_functions.items()):
+        for func_name, original in originals.items():
+            setattr(module, func_name, original)
+            restored += 1
+    
+    # Wrappers still referenced elsewhere (from pandas import read_csv)
+    # go back to the no-op
+    set_tracker(None)
+    
+    if verbose:
+        print(f"✓ {restored} original functions restored")
+        print("="*60)
+        print("✅ All hooks disabled")
+        print("="*60 + "\n")
\ No newline at end of file
@@ -13,7 +13,40 @@ Usage in Jupyter:
 
 from IPython.core.magic import Magics, line_magic, cell_magic, magics_class
 from IPython.display import display, HTML, Image
+import argparse
 import os
+import shlex
+
+
+class _MagicArgumentParser(argparse.ArgumentParser):
+    """ArgumentParser that raises instead of exiting the kernel."""
+    
+    def error(self, message):
+        raise ValueError(message)
+
+
+def _make_parser(*options):
+    """Build an argument parser for a magic from (flag, default) pairs."""
+    parser = _MagicArgumentParser(add_help=False)
+    for flag, default in options:
+        parser.add_argument(flag, default=default)
+    return parser
+
+
+# Built once at import; unknown arguments are ignored
+_START_PARSER = _make_parser(('--db', 'notebook_lineage.db'))
+_SHOW_PARSER = _make_parser(('--format', 'html'), ('--save', None))
+_REPORT_PARSER = _make_parser(('--save', None))
+
+
+def _parse_args(parser, line):
+    """Parse a magic's argument line; returns None on bad input."""
+    try:
+        args, _ = parser.parse_known_args(shlex.split(line))
+    except ValueError as e:
+        print(f"⚠ Invalid arguments: {e}")
+        return None
+    return args
 
 
 @magics_class
@@ -24,6 +57,8 @@ class LineageMagics(Magics):
         super().__init__(shell)
         self.tracker = None
         self.hooks_enabled = False
+        # Last %lineage_show HTML, keyed by lineage version stamp
+        self._show_cache = {}
     
     @line_magic
     def lineage_start(self, line):
@@ -35,33 +70,35 @@ class LineageMagics(Magics):
             %lineage_start --db my_lineage.db
         """
         # Parse arguments
-        args = line.split()
-        db_path = 'notebook_lineage.db'
+        args = _parse_args(_START_PARSER, line)
+        if args is None:
+            return
+        
+        if self.tracker is not None:
+            print("⚠ Lineage tracking already started")
+            return
         
-        for i, arg in enumerate(args):
-            if arg == '--db' and i + 1 < len(args):
-                db_path = args[i + 1]
+        self._start_tracking(args.db)
         
+        print("   Use %lineage_show to visualize")
+        print("   Use %lineage_summary to see stats")
+        print("   Use %lineage_stop to end tracking")
+    
+    def _start_tracking(self, db_path, verbose=True):
+        """Create the tracker and install hooks."""
         # Import here to avoid circular imports
         from .tracker import DatasetTracker
         from .hooks import enable_hooks
         
-        if self.tracker is not None:
-            print("⚠ Lineage tracking already started")
-            return
-        
         # Create tracker
         self.tracker = DatasetTracker(db_path)
         self.tracker.start_run('jupyter_notebook')
         
         # Enable hooks
-        enable_hooks(self.tracker)
+        enable_hooks(self.tracker, verbose=verbose)
         self.hooks_enabled = True
         
         print(f"✅ Lineage tracking started (database: {db_path})")
-        print("   Use %lineage_show to visualize")
-        print("   Use %lineage_summary to see stats")
-        print("   Use %lineage_stop to end tracking")
     
     @line_magic
     def lineage_stop(self, line):
@@ -78,6 +115,7 @@ class LineageMagics(Magics):
         self.tracker.end_run()
         self.tracker.close()
         self.tracker = None
+        self._show_cache = {}
         
         print("✅ Lineage tracking stopped")
     
@@ -93,23 +131,22 @@ class LineageMagics(Magics):
             print("⚠ Tracking not started. Use %lineage_start first")
             return
         
-        summary = self.tracker.get_lineage_summary()
+        # Counts in one query; edges streamed rather than fetched as a list
+        counts = self.tracker.db.get_counts()
         
         print("="*60)
         print("LINEAGE SUMMARY")
         print("="*60)
-        print(f"Datasets tracked: {summary['datasets_count']}")
-        print(f"Operations: {summary['operations_count']}")
-        print(f"Lineage edges: {summary['lineage_edges_count']}")
+        print(f"Datasets tracked: {counts['datasets']}")
+        print(f"Operations: {counts['operations']}")
+        print(f"Lineage edges: {counts['lineage']}")
         
-        if summary['graph']:
+        if counts['lineage']:
             print("\nData Flow:")
-            for edge in summary['graph']:
-                from pathlib import Path
-                source = Path(edge['source']).name
-                target = Path(edge['target']).name
-                op = edge['operation'] or 'transform'
-                print(f"  {source} → {target} ({op})")
+            for source, target, operation, _, _ in self.tracker.iter_graph():
+                source = os.path.basename(source)
+                target = os.path.basename(target)
+                print(f"  {source} → {target} ({operation or 'transform'})")
     
     @line_magic
     def lineage_show(self, line):
@@ -120,40 +157,37 @@ class LineageMagics(Magics):
             %lineage_show
             %lineage_show --format html
             %lineage_show --format png
+            %lineage_show --save lineage.html
         """
         if self.tracker is None:
             print("⚠ Tracking not started. Use %lineage_start first")
             return
         
         # Parse format
-        format_type = 'html'
-        args = line.split()
-        for i, arg in enumerate(args):
-            if arg == '--format' and i + 1 < len(args):
-                format_type = args[i + 1]
-        
-        from .graph import LineageGraph
-        
-        # Create graph
-        graph = LineageGraph(self.tracker.db)
-        graph.build()
-        
-        if graph.graph.number_of_nodes() == 0:
-            print("⚠ No lineage data to visualize yet")
+        args = _parse_args(_SHOW_PARSER, line)
+        if args is None:
             return
+        format_type = args.format
+        save_path = args.save
         
         if format_type == 'html':
-            # Generate interactive HTML
-            output_path = 'notebook_lineage.html'
-            graph.visualize_plotly(output_path)
+            # Generate interactive HTML in memory
+            html_content = self._lineage_html()
+            if html_content is None:
+                return
             
-            # Read and display
-            with open(output_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            if save_path:
+                with open(save_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                print(f"✅ Graph saved to {save_path}")
             
             display(HTML(html_content))
             
         elif format_type == 'png':
+            graph = self._build_graph()
+            if graph is None:
+                return
+            
             # Generate PNG
             output_path = 'notebook_lineage.png'
             graph.visualize_matplotlib(output_path)
@@ -165,6 +199,40 @@ class LineageMagics(Magics):
             print(f"⚠ Unknown format: {format_type}")
             print("   Supported formats: html, png")
     
+    def _build_graph(self):
+        """Build the lineage graph, or return None if it is empty."""
+        from .graph import LineageGraph
+        
+        graph = LineageGraph(self.tracker.db, lock=self.tracker._lock)
+        graph.build()
+        
+        if graph.graph.number_of_nodes() == 0:
+            print("⚠ No lineage data to visualize yet")
+            return None
+        return graph
+    
+    def _lineage_html(self):
+        """
+        Interactive graph HTML, reused while the lineage is unchanged.
+        
+        Returns:
+            HTML string, or None if there is nothing to show
+        """
+        version = self.tracker.db.get_lineage_version()
+        html_content = self._show_cache.get(version)
+        if html_content is not None:
+            return html_content
+        
+        graph = self._build_graph()
+        if graph is None:
+            return None
+        
+        html_content = graph.visualize_plotly(None)
+        if html_content is not None:
+            # Only the latest version can be shown again
+            self._show_cache = {version: html_content}
+        return html_content
+    
     @line_magic
     def lineage_report(self, line):
         """
@@ -181,11 +249,10 @@ class LineageMagics(Magics):
         from .reporter import ComplianceReporter
         
         # Parse arguments
-        save_path = None
-        args = line.split()
-        for i, arg in enumerate(args):
-            if arg == '--save' and i + 1 < len(args):
-                save_path = args[i + 1]
+        args = _parse_args(_REPORT_PARSER, line)
+        if args is None:
+            return
+        save_path = args.save
         
         # Generate report
         reporter = ComplianceReporter(self.tracker.db)
@@ -213,7 +280,7 @@ class LineageMagics(Magics):
         # Auto-start if not started
         if self.tracker is None:
             print("Auto-starting lineage tracking...")
-            self.lineage_start('')
+            self._start_tracking(_START_PARSER.get_default('db'), verbose=False)
         
         # Execute the cell
         self.shell.run_cell(cell)
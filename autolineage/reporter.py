@@ -4,10 +4,85 @@ Focuses on EU AI Act Article 10 (Data Governance).
 """
 
 from datetime import datetime
-from pathlib import Path
-from typing import Optional, Dict, List
+import logging
+import os
+from typing import Optional, Dict, Iterator, List
 import json
 
+from .database import _dumps
+
+logger = logging.getLogger(__name__)
+
+
+# Per-row Markdown templates, filled with str.format_map
+_DATASET_TEMPLATE = """#### Dataset {index}: {filename}
+
+- **File Path:** `{filepath}`
+- **Format:** {format}
+- **Size:** {size}
+- **{hash_label} Hash:** `{hash}`
+- **Created:** {created}
+- **Verification Status:** ✅ Verified
+
+**Data Quality Assurance:**
+- File integrity verified via cryptographic hash
+- Complete provenance tracked
+- Immutable reference maintained
+
+"""
+
+_TRANSFORMATION_TEMPLATE = """#### Transformation {index}: {function}
+
+- **Type:** {type}
+- **Executed:** {executed}
+- **Code Reference:**
+```python
+  {code}
+```
+
+"""
+
+_PARAMETERS_TEMPLATE = "- **Parameters:** `{parameters}`\n"
+
+_TRANSFORMATION_NOTES = """
+**Compliance Notes:**
+- Transformation logic documented
+- Reproducible via code reference
+- Execution timestamp recorded
+
+"""
+
+_EDGE_TEMPLATE = "  {source} → [{operation}] → {target}\n"
+
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Hashes recorded with hash_algorithm='blake3' carry this prefix
+_BLAKE3_PREFIX = 'blake3:'
+
+_SHA256_VERIFICATION = """To verify data integrity, compare the SHA-256 hashes documented in this report 
+with the actual files:
+```bash
+# Verify file integrity (Linux/Mac)
+sha256sum <filename>
+
+# Verify file integrity (Windows)
+certutil -hashfile <filename> SHA256
+```
+"""
+
+_BLAKE3_VERIFICATION = """Hashes prefixed with `blake3:` are BLAKE3 digests. Verify them with `b3sum` 
+(`cargo install b3sum`) and compare the output without the prefix:
+```bash
+# Verify file integrity (BLAKE3)
+b3sum <filename>
+```
+"""
+
+
+def _hash_label(file_hash: str) -> str:
+    """Name of the algorithm that produced a stored hash."""
+    return 'BLAKE3' if file_hash.startswith(_BLAKE3_PREFIX) else 'SHA-256'
+
 
 class ComplianceReporter:
     """Generate compliance reports for regulatory requirements."""
@@ -20,6 +95,79 @@ class ComplianceReporter:
             db: LineageDatabase instance
         """
         self.db = db
+        # (data version, datasets, operations, lineage) from the last fetch
+        self._snap = None
+        # (lineage version, (source count, sink count))
+        self._ss_cache = None
+        # ((data version, run_id), data-derived Markdown sections) kept by
+        # generate_markdown; iter_markdown renders them lazily instead
+        self._sections = None
+    
+    def _snapshot(self):
+        """
+        Fetch datasets, operations and lineage edges.
+        
+        The rows are shared between report formats and reused until
+        the database changes.
+        
+        Returns:
+            (datasets, operations, lineage) tuple
+        """
+        version = self.db.get_data_version()
+        if self._snap is None or self._snap[0] != version:
+            self._snap = (
+                version,
+                self.db.get_all_datasets(),
+                self.db.get_all_operations(),
+                self.db.get_lineage_graph(),
+            )
+        return self._snap[1:]
+    
+    def _iter_data_sections(self, datasets, operations, lineage) -> Iterator[str]:
+        """
+        Render the Markdown sections derived from the database, lazily.
+        
+        The header and compliance statement carry the generation date
+        and are rendered per report.
+        
+        Yields:
+            summary, data sources, transformations, lineage, verification
+        """
+        yield self._generate_executive_summary()
+        yield self._generate_data_sources_section(datasets)
+        yield self._generate_transformations_section(operations)
+        yield self._generate_lineage_section(lineage)
+        yield self._generate_verification_section(datasets)
+    
+    def _cached_sections(self, run_id: Optional[str]) -> Optional[List[str]]:
+        """Sections kept by generate_markdown, if the database is unchanged."""
+        key = (self._snap[0], run_id)
+        if self._sections is not None and self._sections[0] == key:
+            return self._sections[1]
+        return None
+    
+    def _iter_report(self, sections: Iterator[str]) -> Iterator[str]:
+        """Interleave the data sections with the dated ones."""
+        now = datetime.now()  # One timestamp for the whole report
+        
+        yield self._generate_header(now)
+        for _ in range(4):  # Summary through lineage
+            yield next(sections)
+        yield self._generate_compliance_statement(now)
+        yield from sections  # Verification
+    
+    def refresh(self):
+        """Drop cached rows so the next report re-reads the database."""
+        self._snap = None
+        self._ss_cache = None
+        self._sections = None
+    
+    def _source_sink_counts(self) -> tuple:
+        """Source/sink counts, recomputed only when lineage changes."""
+        version = self.db.get_lineage_version()
+        if self._ss_cache is None or self._ss_cache[0] != version:
+            self._ss_cache = (version, self.db.get_source_sink_counts())
+        return self._ss_cache[1]
     
     def generate_markdown(self, run_id: Optional[str] = None) -> str:
         """
@@ -31,28 +179,40 @@ class ComplianceReporter:
         Returns:
             Markdown formatted report
         """
-        # Get data
-        datasets = self.db.get_all_datasets()
-        operations = self.db.get_all_operations()
-        lineage = self.db.get_lineage_graph()
-        
-        # Build report
-        report = self._generate_header()
-        report += self._generate_executive_summary(datasets, operations, lineage)
-        report += self._generate_data_sources_section(datasets)
-        report += self._generate_transformations_section(operations)
-        report += self._generate_lineage_section(lineage)
-        report += self._generate_compliance_statement()
-        report += self._generate_verification_section(datasets)
-        
-        return report
+        datasets, operations, lineage = self._snapshot()
+        sections = self._cached_sections(run_id)
+        if sections is None:
+            # Kept until the database changes
+            sections = list(self._iter_data_sections(datasets, operations, lineage))
+            self._sections = ((self._snap[0], run_id), sections)
+        return "".join(self._iter_report(iter(sections)))
     
-    def _generate_header(self) -> str:
+    def iter_markdown(self, run_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate the Markdown report one section at a time.
+        
+        Lets callers write large reports without holding the whole
+        text in memory: each section is rendered when it is reached,
+        unless generate_markdown() already cached it.
+        
+        Args:
+            run_id: Optional run ID to filter by
+            
+        Yields:
+            Markdown text of each report section, in order
+        """
+        datasets, operations, lineage = self._snapshot()
+        sections = self._cached_sections(run_id)
+        if sections is None:
+            sections = self._iter_data_sections(datasets, operations, lineage)
+        yield from self._iter_report(iter(sections))
+    
+    def _generate_header(self, now: datetime) -> str:
         """Generate report header."""
         return f"""# ML Model Data Lineage Report
 
 **Report Type:** EU AI Act Article 10 Compliance  
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}  
+**Generated:** {now.strftime('%Y-%m-%d %H:%M:%S UTC')}  
 **Standard:** EU Artificial Intelligence Act (Regulation 2024/1689)  
 **Article:** Article 10 - Data and Data Governance
 
@@ -60,27 +220,17 @@ class ComplianceReporter:
 
 """
     
-    def _generate_executive_summary(
-        self, 
-        datasets: List, 
-        operations: List, 
-        lineage: List
-    ) -> str:
+    def _generate_executive_summary(self) -> str:
         """Generate executive summary."""
         
-        # Calculate stats
-        total_datasets = len(datasets)
-        total_operations = len(operations)
-        total_lineage = len(lineage)
-        
-        # Get sources and sinks
-        sources = set()
-        sinks = set()
-        all_sources = {edge['source'] for edge in lineage}
-        all_targets = {edge['target'] for edge in lineage}
+        # Calculate stats (aggregated in SQLite, no rows fetched)
+        counts = self.db.get_counts()
+        total_datasets = counts['datasets']
+        total_operations = counts['operations']
+        total_lineage = counts['lineage']
         
-        sources = all_sources - all_targets  # Files with no inputs
-        sinks = all_targets - all_sources    # Files with no outputs
+        # Sources: files with no inputs; sinks: files with no outputs
+        source_count, sink_count = self._source_sink_counts()
         
         return f"""## Executive Summary
 
@@ -92,8 +242,8 @@ and robust data governance practices.
 - **Total Datasets Tracked:** {total_datasets}
 - **Data Transformations:** {total_operations}
 - **Lineage Relationships:** {total_lineage}
-- **Source Datasets:** {len(sources)}
-- **Output Artifacts:** {len(sinks)}
+- **Source Datasets:** {source_count}
+- **Output Artifacts:** {sink_count}
 
 **Compliance Status:** ✅ **COMPLIANT**
 
@@ -107,129 +257,109 @@ from raw data to model artifacts is maintained with cryptographic verification.
     def _generate_data_sources_section(self, datasets: List) -> str:
         """Generate data sources section."""
         
-        section = """## 1. Data Sources
+        parts = ["""## 1. Data Sources
 
 ### 1.1 Training Data Inventory
 
 All datasets used in model development are documented below with cryptographic hashes 
 for integrity verification.
 
-"""
+"""]
         
         for i, ds in enumerate(datasets, 1):
             filepath = ds['filepath']
-            filename = Path(filepath).name
-            file_hash = ds['hash']
-            size = ds['size']
-            format_type = ds['format'] or 'unknown'
-            created = ds['created_at']
             
-            section += f"""#### Dataset {i}: {filename}
-
-- **File Path:** `{filepath}`
-- **Format:** {format_type.upper()}
-- **Size:** {self._format_bytes(size)}
-- **SHA-256 Hash:** `{file_hash}`
-- **Created:** {created}
-- **Verification Status:** ✅ Verified
-
-**Data Quality Assurance:**
-- File integrity verified via cryptographic hash
-- Complete provenance tracked
-- Immutable reference maintained
-
-"""
+            parts.append(_DATASET_TEMPLATE.format_map({
+                'index': i,
+                'filename': os.path.basename(filepath),
+                'filepath': filepath,
+                'format': (ds['format'] or 'unknown').upper(),
+                'size': self._format_bytes(ds['size']),
+                'hash_label': _hash_label(ds['hash']),
+                'hash': ds['hash'],
+                'created': ds['created_at'],
+            }))
         
-        return section + "---\n\n"
+        parts.append("---\n\n")
+        return "".join(parts)
     
     def _generate_transformations_section(self, operations: List) -> str:
         """Generate transformations section."""
         
-        section = """## 2. Data Transformations
+        parts = ["""## 2. Data Transformations
 
 ### 2.1 Processing Pipeline
 
 All data transformations are logged with complete audit trail.
 
-"""
+"""]
         
         if not operations:
-            section += "*No transformations recorded.*\n\n"
-            return section + "---\n\n"
+            parts.append("*No transformations recorded.*\n\n---\n\n")
+            return "".join(parts)
         
         for i, op in enumerate(operations, 1):
-            op_type = op['operation_type']
-            func_name = op['function_name'] or 'unknown'
-            code = op['code_snippet'] or 'N/A'
-            params = op['parameters']
-            executed = op['executed_at']
-            
-            section += f"""#### Transformation {i}: {func_name}
-
-- **Type:** {op_type}
-- **Executed:** {executed}
-- **Code Reference:**
-```python
-  {code}
-```
-
-"""
+            parts.append(_TRANSFORMATION_TEMPLATE.format_map({
+                'index': i,
+                'function': op['function_name'] or 'unknown',
+                'type': op['operation_type'],
+                'executed': op['executed_at'],
+                'code': op['code_snippet'] or 'N/A',
+            }))
             
+            params = op['parameters']
             if params:
-                params_dict = json.loads(params) if isinstance(params, str) else params
-                section += f"- **Parameters:** `{params_dict}`\n"
+                # Stored as JSON text already: embed it without a round-trip
+                if not isinstance(params, str):
+                    params = json.dumps(params)
+                parts.append(_PARAMETERS_TEMPLATE.format_map({'parameters': params}))
             
-            section += """
-**Compliance Notes:**
-- Transformation logic documented
-- Reproducible via code reference
-- Execution timestamp recorded
-
-"""
+            parts.append(_TRANSFORMATION_NOTES)
         
-        return section + "---\n\n"
+        parts.append("---\n\n")
+        return "".join(parts)
     
     def _generate_lineage_section(self, lineage: List) -> str:
         """Generate lineage graph section."""
         
-        section = """## 3. Data Lineage Graph
+        parts = ["""## 3. Data Lineage Graph
 
 ### 3.1 Complete Provenance Chain
 
 The following lineage graph shows the complete data flow from source to output:
 
-"""
+"""]
         
         if not lineage:
-            section += "*No lineage relationships recorded.*\n\n"
-            return section + "---\n\n"
+            parts.append("*No lineage relationships recorded.*\n\n---\n\n")
+            return "".join(parts)
         
-        section += "```\n"
-        section += "Data Flow:\n"
+        parts.append("```\nData Flow:\n")
         
         for edge in lineage:
-            source = Path(edge['source']).name
-            target = Path(edge['target']).name
-            operation = edge['operation'] or 'transformation'
-            
-            section += f"  {source} → [{operation}] → {target}\n"
+            parts.append(_EDGE_TEMPLATE.format_map({
+                'source': os.path.basename(edge['source']),
+                'target': os.path.basename(edge['target']),
+                'operation': edge['operation'] or 'transformation',
+            }))
         
-        section += "```\n\n"
+        parts.append("```\n\n")
         
-        section += """**Lineage Verification:**
+        parts.append("""**Lineage Verification:**
 - ✅ All transformations tracked
 - ✅ Source-to-output chain complete
 - ✅ No gaps in provenance
 - ✅ Reproducible pipeline documented
 
-"""
+""")
         
-        return section + "---\n\n"
+        parts.append("---\n\n")
+        return "".join(parts)
     
-    def _generate_compliance_statement(self) -> str:
+    def _generate_compliance_statement(self, now: datetime) -> str:
         """Generate compliance statement."""
         
-        return """## 4. EU AI Act Compliance Statement
+        return f"""## 4. EU AI Act Compliance Statement
 
 ### 4.1 Article 10 Requirements
 
@@ -259,7 +389,7 @@ This report demonstrates compliance with EU AI Act Article 10 requirements:
 
 **Regulation:** EU Artificial Intelligence Act (Regulation 2024/1689)  
 **Applicable Articles:** Article 10 (Data and Data Governance)  
-**Compliance Date:** {datetime.now().strftime('%Y-%m-%d')}  
+**Compliance Date:** {now.strftime('%Y-%m-%d')}  
 **Verification Method:** Automated lineage tracking with cryptographic proof
 
 **Declaration:**
@@ -277,20 +407,20 @@ This system maintains comprehensive data lineage tracking that enables:
     def _generate_verification_section(self, datasets: List) -> str:
         """Generate verification section."""
         
-        section = """## 5. Verification & Reproducibility
+        # Instructions for each hash algorithm present in the report
+        blake3_count = sum(ds['hash'].startswith(_BLAKE3_PREFIX) for ds in datasets)
+        methods = []
+        if not datasets or blake3_count < len(datasets):
+            methods.append(_SHA256_VERIFICATION)
+        if blake3_count:
+            methods.append(_BLAKE3_VERIFICATION)
+        hash_methods = "\n".join(methods)
+        
+        section = f"""## 5. Verification & Reproducibility
 
 ### 5.1 Hash Verification
 
-To verify data integrity, compare the SHA-256 hashes documented in this report 
-with the actual files:
-```bash
-# Verify file integrity (Linux/Mac)
-sha256sum <filename>
-
-# Verify file integrity (Windows)
-certutil -hashfile <filename> SHA256
-```
-
+{hash_methods}
 ### 5.2 Reproducibility Instructions
 
 To reproduce the training pipeline:
@@ -335,9 +465,7 @@ lineage show --format html
         Returns:
             Dictionary with compliance data
         """
-        datasets = self.db.get_all_datasets()
-        operations = self.db.get_all_operations()
-        lineage = self.db.get_lineage_graph()
+        datasets, operations, lineage = self._snapshot()
         
         return {
             'report_type': 'eu_ai_act_compliance',
@@ -353,7 +481,7 @@ lineage show --format html
             'datasets': [
                 {
                     'filepath': ds['filepath'],
-                    'filename': Path(ds['filepath']).name,
+                    'filename': os.path.basename(ds['filepath']),
                     'hash': ds['hash'],
                     'size': ds['size'],
                     'format': ds['format'],
@@ -382,29 +510,25 @@ lineage show --format html
     
     def save_markdown(self, filepath: str = 'compliance_report.md', run_id: Optional[str] = None):
         """Save report as Markdown file."""
-        report = self.generate_markdown(run_id)
-        
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(report)
+            f.writelines(self.iter_markdown(run_id))
         
-        print(f"✓ Compliance report saved to {filepath}")
+        logger.info("✓ Compliance report saved to %s", filepath)
         return filepath
     
     def save_json(self, filepath: str = 'compliance_report.json', run_id: Optional[str] = None):
         """Save report as JSON file."""
         report = self.generate_json(run_id)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(_dumps(report, indent=True))
         
-        print(f"✓ Compliance report saved to {filepath}")
+        logger.info("✓ Compliance report saved to %s", filepath)
         return filepath
     
     @staticmethod
     def _format_bytes(size: int) -> str:
         """Format bytes as human-readable string."""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f"{size:.2f} {unit}"
-            size /= 1024
-        return f"{size:.2f} TB"
\ No newline at end of file
+        # Unit index from the bit length: every 10 bits is a factor of 1024
+        exp = min((size.bit_length() - 1) // 10, 4) if size > 0 else 0
+        return f"{size / (1 << (10 * exp)):.2f} {_BYTE_UNITS[exp]}"
\ No newline at end of file
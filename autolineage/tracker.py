@@ -3,81 +3,242 @@ Core tracking module for automatic lineage capture.
 """
 
 import hashlib
+import linecache
+import logging
+import mmap
 import os
-from pathlib import Path
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import product
+from stat import S_ISREG
 from typing import Optional, Dict, Any
-from datetime import datetime
 
 from .database import LineageDatabase
 
+logger = logging.getLogger(__name__)
 
-def hash_file(filepath: str) -> str:
+# Read size when a file can't be memory-mapped. Large reads keep the
+# per-chunk interpreter overhead negligible and let hashlib release the
+# GIL for each update, at the cost of 1 MiB of buffer per hashing thread.
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Files above this size are memory-mapped when file_digest is unavailable
+_MMAP_THRESHOLD = 8 * 1024 * 1024
+
+
+def _advise_sequential(f):
+    """
+    Tell the kernel a file will be read front to back.
+    
+    Enables aggressive read-ahead so hashing large files is bound by
+    disk throughput rather than page faults. No-op where unsupported.
+    """
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _new_sha256(data=b''):
+    """Create a SHA256 object, skipping FIPS wrappers where supported."""
+    try:
+        return hashlib.new('sha256', data, usedforsecurity=False)
+    except TypeError:  # Python 3.8 has no usedforsecurity
+        return hashlib.new('sha256', data)
+
+
+# Interpreters built without OpenSSL hash with a much slower portable
+# implementation that can't use the CPU's SHA extensions
+if not getattr(hashlib.sha256, '__name__', '').startswith('openssl_'):
+    logger.debug("hashlib is not backed by OpenSSL; file hashing will be slower")
+
+
+# Content hash algorithms accepted by hash_file
+_HASH_ALGORITHMS = ('sha256', 'blake3')
+
+# Digests of empty content, so zero-byte files are never opened
+_EMPTY_HASHES = {
+    'sha256': hashlib.sha256(b'').hexdigest(),
+    'blake3': 'blake3:af1349b9f5f9a1a6a0404dea36dcc9499bcb25c9adc112b7cc9a93cae41f3262',
+}
+
+
+def _hash_blake3(filepath: str) -> str:
+    """Hash a file with BLAKE3, returning a 'blake3:'-prefixed hex digest."""
+    import blake3  # Optional: pip install autolineage[blake3]
+    
+    hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+    hasher.update_mmap(filepath)
+    return 'blake3:' + hasher.hexdigest()
+
+
+def _hash_matches(file_hash: str, algorithm: str) -> bool:
+    """Check whether a stored hash was produced by the given algorithm."""
+    return file_hash.startswith('blake3:') == (algorithm == 'blake3')
+
+
+def _hash_file(filepath: str, algorithm: str = 'sha256') -> str:
+    """Hash a file like hash_file, raising instead of returning None."""
+    if algorithm == 'blake3':
+        return _hash_blake3(filepath)
+    
+    with open(filepath, 'rb', buffering=0) as f:  # Raw FileIO: no extra copy
+        _advise_sequential(f)
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: hashing loop runs in C without the GIL
+            return hashlib.file_digest(f, _new_sha256).hexdigest()
+        
+        # Older Pythons: hand OpenSSL one contiguous mapped buffer for
+        # large files; small ones are cheaper to read than to map
+        if os.fstat(f.fileno()).st_size > _MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    return _new_sha256(mm).hexdigest()
+            except (OSError, ValueError):
+                pass  # Unmappable (pipes, some network mounts)
+        
+        sha256 = _new_sha256()
+        buffer = bytearray(_HASH_CHUNK_SIZE)  # Reused for every read
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            sha256.update(view[:size])
+        return sha256.hexdigest()
+
+
+def hash_file(filepath: str, algorithm: str = 'sha256') -> str:
     """
-    Generate SHA256 hash of a file.
+    Generate a content hash of a file.
     
     Args:
         filepath: Path to file
+        algorithm: 'sha256' (default) or 'blake3'. BLAKE3 is much
+            faster but needs the optional blake3 package
         
     Returns:
-        SHA256 hash as hex string
+        SHA256 hash as hex string, or 'blake3:<hex>' for BLAKE3, or
+        None if the file couldn't be read
     """
-    sha256 = hashlib.sha256()
-    
     try:
-        with open(filepath, 'rb') as f:
-            # Read in chunks for memory efficiency
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        return _hash_file(filepath, algorithm)
     except Exception as e:
-        print(f"Error hashing file {filepath}: {e}")
+        logger.warning("Error hashing file %s: %s", filepath, e)
         return None
 
 
-def get_file_info(filepath: str) -> Dict[str, Any]:
+@lru_cache(maxsize=4096)
+def _hash_cached(
+    filepath: str, inode: int, mtime_ns: int, size: int, algorithm: str = 'sha256'
+) -> str:
+    """
+    Hash a file, memoized on its stat signature.
+    
+    inode, mtime_ns and size are part of the cache key, so a modified
+    file, or one atomically replaced by a rename, misses the cache and
+    is re-hashed. Errors propagate, since lru_cache doesn't store them:
+    a file that couldn't be read is hashed again on the next call.
+    """
+    return _hash_file(filepath, algorithm)
+
+
+def get_file_info(
+    filepath: str, db: LineageDatabase = None, algorithm: str = 'sha256'
+) -> Dict[str, Any]:
     """
     Get metadata about a file.
     
     Args:
         filepath: Path to file
+        db: Optional database whose hash cache is used, so files
+            unchanged since an earlier run aren't re-hashed
+        algorithm: Content hash algorithm (see hash_file)
         
     Returns:
         Dictionary with file metadata
     """
-    path = Path(filepath)
-    
-    if not path.exists():
+    # One stat call serves the existence check, size, mtime and cache key
+    try:
+        stat = os.stat(filepath)
+    except (OSError, ValueError):
         return None
     
-    stat = path.stat()
+    abs_path = os.path.abspath(filepath)
+    filename = os.path.basename(abs_path)
+    suffix = os.path.splitext(filename)[1]
+    
+    if stat.st_size == 0 and S_ISREG(stat.st_mode):
+        file_hash = _EMPTY_HASHES[algorithm]
+    else:
+        signature = (stat.st_ino, stat.st_dev, stat.st_mtime_ns, stat.st_size)
+        file_hash = db.get_cached_hash(abs_path, *signature) if db is not None else None
+        if file_hash is None or not _hash_matches(file_hash, algorithm):
+            try:
+                file_hash = _hash_cached(
+                    abs_path, stat.st_ino, stat.st_mtime_ns, stat.st_size, algorithm
+                )
+            except Exception as e:
+                logger.warning("Error hashing file %s: %s", filepath, e)
+                return None
+            if db is not None:
+                db.save_hash(abs_path, *signature, file_hash)
     
     return {
-        'filepath': str(path.absolute()),
-        'filename': path.name,
+        'filepath': abs_path,
+        'filename': filename,
         'size': stat.st_size,
-        'format': path.suffix[1:] if path.suffix else None,  # Remove leading dot
-        'modified': datetime.fromtimestamp(stat.st_mtime),
-        'hash': hash_file(filepath)
+        'format': suffix[1:] or None,  # Remove leading dot
+        'modified_ns': stat.st_mtime_ns,  # Epoch ns; format when displayed
+        'hash': file_hash
     }
 
 
 class DatasetTracker:
     """Tracks datasets and their lineage."""
     
-    def __init__(self, db_path: str = "lineage.db"):
+    def __init__(self, db_path: str = "lineage.db", hash_algorithm: str = "sha256"):
         """
         Initialize tracker.
         
         Args:
             db_path: Path to SQLite database
+            hash_algorithm: Content hash algorithm, 'sha256' or 'blake3'.
+                SHA256 hashes can be checked with sha256sum; BLAKE3 is
+                faster and is stored with a 'blake3:' prefix
         """
+        if hash_algorithm not in _HASH_ALGORITHMS:
+            raise ValueError(
+                f"Unknown hash algorithm {hash_algorithm!r}, "
+                f"expected one of {_HASH_ALGORITHMS}"
+            )
+        if hash_algorithm == 'blake3':
+            try:
+                import blake3  # noqa: F401
+            except ImportError:
+                logger.warning(
+                    "⚠ blake3 not installed, using SHA256. "
+                    "Install with: pip install autolineage[blake3]"
+                )
+                hash_algorithm = 'sha256'
+        self.hash_algorithm = hash_algorithm
+        
         self.db = LineageDatabase(db_path)
+        # Serializes database access; hooks may track from a background thread
+        self._lock = threading.RLock()
         self.current_run_id = None
         self.tracked_files = {}  # filepath -> dataset_id mapping
         
-        # NEW: Track recent file operations for automatic lineage
-        self.recent_reads = []   # List of recently read files
-        self.recent_writes = []  # List of recently written files
+        # NEW: Track recent file operations for automatic lineage. Dicts
+        # keep insertion order with O(1) membership tests (values unused)
+        self.recent_reads = {}
+        self.recent_writes = {}
         self.last_operation_code = None
     
     
@@ -85,7 +246,8 @@ class DatasetTracker:
         self, 
         filepath: str, 
         operation_type: str = "read",
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        caller: tuple = None
     ) -> Optional[str]:
         """
         Track a file (dataset).
@@ -94,111 +256,221 @@ class DatasetTracker:
             filepath: Path to file
             operation_type: Type of operation (read/write)
             metadata: Additional metadata
+            caller: (function name, filename, line number) of the code
+                that did the I/O, recorded on lineage created by a
+                write. Defaults to the frame three levels up
             
         Returns:
             Dataset ID if successful, None otherwise
         """
-        # Get file info
-        file_info = get_file_info(filepath)
-        
-        if not file_info:
-            print(f"Warning: Could not track file {filepath} (not found)")
-            return None
-        
-        # Check if already tracked
-        abs_path = file_info['filepath']
-        file_hash = file_info['hash']
-        
-        if abs_path in self.tracked_files:
-            existing_id = self.tracked_files[abs_path]
+        with self._lock:
+            # Check if already tracked: no stat or hash needed
+            abs_path = os.path.abspath(filepath)
+            
+            if abs_path in self.tracked_files:
+                existing_id = self.tracked_files[abs_path]
+                
+                # NEW: Still track in recent operations
+                if operation_type == "read":
+                    self.recent_reads[abs_path] = None
+                elif operation_type == "write":
+                    if abs_path not in self.recent_writes:
+                        self.recent_writes[abs_path] = None
+                        # Auto-create lineage from recent reads to this write
+                        self._auto_create_lineage(abs_path, caller)
+                
+                return existing_id
+            
+            # Get file info (an absolute path spares it another getcwd).
+            # Writes are hashed here too, not lazily: datasets.hash is NOT
+            # NULL, add_dataset dedupes on it, and reports built from the
+            # database in another process need it. The hash is cached, so
+            # a later read of this file version doesn't hash it again.
+            # The hash-cache row and the dataset row share one commit.
+            with self.db.batch():
+                file_info = get_file_info(abs_path, self.db, self.hash_algorithm)
+                
+                if not file_info:
+                    logger.warning("Could not track file %s (not found or unreadable)", filepath)
+                    return None
+                
+                file_hash = file_info['hash']
+                
+                # Add to database
+                dataset_id = self.db.add_dataset(
+                    filepath=abs_path,
+                    file_hash=file_hash,
+                    size=file_info['size'],
+                    file_format=file_info['format'],
+                    metadata=metadata
+                )
+            
+            # Cache it
+            self.tracked_files[abs_path] = dataset_id
             
-            # NEW: Still track in recent operations
+            # NEW: Track in recent operations
             if operation_type == "read":
-                if abs_path not in self.recent_reads:
-                    self.recent_reads.append(abs_path)
+                self.recent_reads[abs_path] = None
             elif operation_type == "write":
-                if abs_path not in self.recent_writes:
-                    self.recent_writes.append(abs_path)
-                    # Auto-create lineage from recent reads to this write
-                    self._auto_create_lineage(abs_path)
+                self.recent_writes[abs_path] = None
+                # Auto-create lineage from recent reads to this write
+                self._auto_create_lineage(abs_path, caller)
+            
+            # Per-file hot path: skip the formatting work when INFO is off
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("✓ Tracked %s: %s (ID: %s...)", operation_type, filepath, dataset_id[:8])
             
-            return existing_id
+            return dataset_id
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group several tracking calls into one database transaction.
+        
+        Usage:
+            with tracker.batch():
+                tracker.track_file('raw.csv', 'read')
+                tracker.track_transformation(...)
+        
+        If the block raises, the transaction is rolled back and the
+        tracked files and recent reads/writes are restored, so no ID of
+        a rolled-back row is kept.
+        """
+        with self._lock:
+            saved = (
+                dict(self.tracked_files),
+                dict(self.recent_reads),
+                dict(self.recent_writes),
+            )
+            try:
+                with self.db.batch():
+                    yield self
+            except BaseException:
+                self.tracked_files, self.recent_reads, self.recent_writes = saved
+                raise
+    
+    def track_files_bulk(self, events) -> list:
+        """
+        Track many files in a single database transaction.
+        
+        Args:
+            events: Iterable of (filepath, operation_type) or
+                (filepath, operation_type, caller) tuples, processed in
+                order. caller is passed on to track_file
+            
+        Returns:
+            List of dataset IDs (None for files that could not be tracked)
+        """
+        with self.batch():
+            return [
+                self.track_file(filepath, operation_type, caller=caller[0] if caller else None)
+                for filepath, operation_type, *caller in events
+            ]
+    
+    def _prehash(self, filepaths: list):
+        """
+        Hash files that need it in parallel, warming the hash cache.
         
-        # Add to database
-        dataset_id = self.db.add_dataset(
-            filepath=abs_path,
-            file_hash=file_hash,
-            size=file_info['size'],
-            file_format=file_info['format'],
-            metadata=metadata
-        )
+        hashlib releases the GIL while hashing, so threads overlap disk
+        reads and use several cores. Database lookups stay on this thread.
         
-        # Cache it
-        self.tracked_files[abs_path] = dataset_id
+        Args:
+            filepaths: Paths about to be tracked
+        """
+        pending = []
+        for abs_path in dict.fromkeys(map(os.path.abspath, filepaths)):
+            if abs_path in self.tracked_files:
+                continue
+            try:
+                stat = os.stat(abs_path)
+            except OSError:
+                continue  # track_file reports missing files
+            if stat.st_size == 0:
+                continue  # get_file_info doesn't hash empty files
+            cached = self.db.get_cached_hash(
+                abs_path, stat.st_ino, stat.st_dev, stat.st_mtime_ns, stat.st_size
+            )
+            if cached is None or not _hash_matches(cached, self.hash_algorithm):
+                pending.append((
+                    abs_path, stat.st_ino, stat.st_mtime_ns, stat.st_size,
+                    self.hash_algorithm
+                ))
         
-        # NEW: Track in recent operations
-        if operation_type == "read":
-            self.recent_reads.append(abs_path)
-        elif operation_type == "write":
-            self.recent_writes.append(abs_path)
-            # Auto-create lineage from recent reads to this write
-            self._auto_create_lineage(abs_path)
+        if len(pending) < 2:
+            return  # Nothing to overlap
         
-        print(f"✓ Tracked {operation_type}: {filepath} (ID: {dataset_id[:8]}...)")
+        def warm(args):
+            try:
+                _hash_cached(*args)
+            except Exception as e:
+                # Not cached: track_file hashes it again and reports it
+                logger.debug("Error prehashing file %s: %s", args[0], e)
         
-        return dataset_id
-    def _auto_create_lineage(self, output_file):
+        workers = min(32, (os.cpu_count() or 1) * 2, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(warm, pending))
+    
+    def _auto_create_lineage(self, output_file, caller: tuple = None):
         """
         Automatically create lineage from recent reads to this write.
         
         Args:
             output_file: File that was just written
+            caller: (function name, filename, line number) of the write,
+                or None to look three frames up the stack
         """
         if not self.recent_reads:
             return  # No inputs to link
         
-        # Create operation for this transformation
-        import inspect
-        
-        # Try to get calling function info
-        frame = inspect.currentframe()
-        caller_frame = frame.f_back.f_back.f_back  # Go up the stack
+        if caller is None:
+            # Try to get calling function info, three frames up the stack
+            try:
+                caller_frame = sys._getframe(3)
+            except ValueError:  # Stack is shallower than that
+                caller_frame = None
+            if caller_frame:
+                caller = (
+                    caller_frame.f_code.co_name,
+                    caller_frame.f_code.co_filename,
+                    caller_frame.f_lineno,
+                )
         
         function_name = "unknown"
         code_snippet = None
         
-        if caller_frame:
-            function_name = caller_frame.f_code.co_name
-            # Get a few lines of code context
+        if caller:
+            function_name, filename, lineno = caller
+            # linecache keeps each script's lines after the first lookup
             try:
-                import linecache
-                filename = caller_frame.f_code.co_filename
-                lineno = caller_frame.f_lineno
                 code_snippet = linecache.getline(filename, lineno).strip()
             except:
                 pass
         
-        # Create operation
-        operation_id = self.db.add_operation(
-            operation_type='transform',
-            function_name=function_name,
-            code_snippet=code_snippet
-        )
-        
-        # Link all recent reads to this write
-        output_id = self.tracked_files.get(output_file)
-        if output_id:
-            for input_file in self.recent_reads:
+        # Operation and edges share one transaction
+        with self.db.batch():
+            operation_id = self.db.add_operation(
+                operation_type='transform',
+                function_name=function_name,
+                code_snippet=code_snippet
+            )
+            
+            # Link all recent reads to this write
+            output_id = self.tracked_files.get(output_file)
+            if output_id and len(self.recent_reads) == 1:
+                # Common read -> transform -> write case: one plain insert
+                (input_file,) = self.recent_reads
                 input_id = self.tracked_files.get(input_file)
                 if input_id:
-                    self.db.add_lineage(
-                        source_id=input_id,
-                        target_id=output_id,
-                        operation_id=operation_id
-                    )
+                    self.db.add_lineage(input_id, output_id, operation_id)
+            elif output_id:
+                self.db.add_lineage_bulk(
+                    (input_id, output_id, operation_id)
+                    for input_id in map(self.tracked_files.get, self.recent_reads)
+                    if input_id
+                )
         
         # Clear recent reads after creating lineage
-        self.recent_reads = []
+        self.recent_reads = {}
         
     def track_transformation(
         self,
@@ -221,41 +493,46 @@ class DatasetTracker:
         Returns:
             Operation ID
         """
-        # Track source files
-        source_ids = []
-        for filepath in source_files:
-            dataset_id = self.track_file(filepath, "read")
-            if dataset_id:
-                source_ids.append(dataset_id)
-        
-        # Track target files
-        target_ids = []
-        for filepath in target_files:
-            dataset_id = self.track_file(filepath, "write")
-            if dataset_id:
-                target_ids.append(dataset_id)
-        
-        # Add operation
-        operation_id = self.db.add_operation(
-            operation_type="transform",
-            function_name=function_name,
-            code_snippet=code_snippet,
-            parameters=parameters
-        )
-        
-        # Add lineage relationships
-        for source_id in source_ids:
-            for target_id in target_ids:
-                self.db.add_lineage(
-                    source_id=source_id,
-                    target_id=target_id,
-                    operation_id=operation_id,
+        with self._lock:
+            # Hash new files concurrently; track_file then hits the cache
+            self._prehash(list(source_files) + list(target_files))
+            
+            # All writes below share one transaction
+            with self.batch():
+                # Track source files
+                source_ids = []
+                for filepath in source_files:
+                    dataset_id = self.track_file(filepath, "read")
+                    if dataset_id:
+                        source_ids.append(dataset_id)
+                
+                # Track target files
+                target_ids = []
+                for filepath in target_files:
+                    dataset_id = self.track_file(filepath, "write")
+                    if dataset_id:
+                        target_ids.append(dataset_id)
+                
+                # Add operation
+                operation_id = self.db.add_operation(
+                    operation_type="transform",
+                    function_name=function_name,
+                    code_snippet=code_snippet,
+                    parameters=parameters
+                )
+                
+                # Add lineage relationships: every source -> every target
+                self.db.add_lineage_bulk(
+                    [
+                        (source_id, target_id, operation_id)
+                        for source_id, target_id in product(source_ids, target_ids)
+                    ],
                     relationship_type="derived_from"
                 )
-        
-        print(f"✓ Tracked transformation: {function_name}")
-        
-        return operation_id
+            
+            logger.info("✓ Tracked transformation: %s", function_name)
+            
+            return operation_id
     
     def operation(self, operation_type, function_name):
         """
@@ -272,22 +549,25 @@ class DatasetTracker:
     
     def start_run(self, script_path: str = None):
         """Start a new tracking run."""
-        self.current_run_id = self.db.start_run(script_path)
-        print(f"✓ Started tracking run: {self.current_run_id[:8]}...")
-        return self.current_run_id
+        with self._lock:
+            self.current_run_id = self.db.start_run(script_path)
+            logger.info("✓ Started tracking run: %s...", self.current_run_id[:8])
+            return self.current_run_id
     
     def end_run(self, status: str = "completed"):
         """End the current tracking run."""
-        if self.current_run_id:
-            self.db.end_run(self.current_run_id, status)
-            print(f"✓ Ended tracking run: {self.current_run_id[:8]}... ({status})")
-            self.current_run_id = None
+        with self._lock:
+            if self.current_run_id:
+                self.db.end_run(self.current_run_id, status)
+                logger.info("✓ Ended tracking run: %s... (%s)", self.current_run_id[:8], status)
+                self.current_run_id = None
     
     def get_lineage_summary(self):
         """Get summary of tracked lineage."""
-        datasets = self.db.get_all_datasets()
-        operations = self.db.get_all_operations()
-        graph_edges = self.db.get_lineage_graph()
+        with self._lock:
+            datasets = self.db.get_all_datasets()
+            operations = self.db.get_all_operations()
+            graph_edges = self.db.get_lineage_graph()
         
         return {
             'datasets_count': len(datasets),
@@ -298,11 +578,32 @@ class DatasetTracker:
             'graph': graph_edges
         }
     
+    def iter_graph(self, batch: int = 5000):
+        """
+        Stream lineage edges without materializing the whole graph.
+        
+        Args:
+            batch: Number of rows fetched per round trip
+            
+        Yields:
+            (source, target, operation, operation_type, created_at) tuples
+        """
+        return self.db.get_lineage_graph_iter(batch)
+    
+    def iter_edge_descriptions(self):
+        """
+        Stream "source → target (operation)" lines for every lineage edge.
+        
+        Cheaper than get_lineage_summary() when the edges are only printed.
+        """
+        return self.db.iter_edge_descriptions()
+    
     def close(self):
         """Close tracker and database connection."""
         if hasattr(self, 'db') and self.db:
-            self.db.close()
-            print("✓ Tracker closed")
+            with self._lock:
+                self.db.close()
+            logger.info("✓ Tracker closed")
     
 class LineageContext:
     """
@@ -348,24 +649,28 @@ class LineageContext:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit context and save operation."""
         if exc_type is None:  # No exception
-            # Create operation
-            self.operation_id = self.tracker.db.add_operation(
-                operation_type=self.operation_type,
-                function_name=self.function_name,
-                code_snippet=self.code_snippet,
-                parameters=self.parameters
-            )
-            
-            # Create lineage relationships
-            for input_file in self.inputs:
-                input_id = self.tracker.track_file(input_file, 'read')
-                for output_file in self.outputs:
-                    output_id = self.tracker.track_file(output_file, 'write')
-                    if input_id and output_id:
-                        self.tracker.db.add_lineage(
-                            source_id=input_id,
-                            target_id=output_id,
-                            operation_id=self.operation_id
-                        )
+            with self.tracker._lock:
+                # Hash every file concurrently before the serial DB writes
+                self.tracker._prehash(self.inputs + self.outputs)
+                
+                with self.tracker.batch():
+                    # Create operation
+                    self.operation_id = self.tracker.db.add_operation(
+                        operation_type=self.operation_type,
+                        function_name=self.function_name,
+                        code_snippet=self.code_snippet,
+                        parameters=self.parameters
+                    )
+                    
+                    # Create lineage relationships
+                    edges = []
+                    for input_file in self.inputs:
+                        input_id = self.tracker.track_file(input_file, 'read')
+                        for output_file in self.outputs:
+                            output_id = self.tracker.track_file(output_file, 'write')
+                            if input_id and output_id:
+                                edges.append((input_id, output_id, self.operation_id))
+                    
+                    self.tracker.db.add_lineage_bulk(edges)
             
-            print(f"✓ Operation tracked: {self.function_name}") 
\ No newline at end of file
+            logger.info("✓ Operation tracked: %s", self.function_name) 
\ No newline at end of file
@@ -2,9 +2,8 @@
 Test automatic operation tracking.
 """
 
-import os
-if os.path.exists('lineage.db'):
-    os.remove('lineage.db')
+from pathlib import Path
+Path('lineage.db').unlink(missing_ok=True)
 
 # Enable automatic tracking
 import autolineage.auto
@@ -3,9 +3,8 @@ Test automatic tracking - no manual track_file() calls!
 """
 
 # Clean up old files
-import os
-if os.path.exists('lineage.db'):
-    os.remove('lineage.db')
+from pathlib import Path
+Path('lineage.db').unlink(missing_ok=True)
 
 # THIS IS THE MAGIC LINE - enables automatic tracking
 import autolineage.auto
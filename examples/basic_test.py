@@ -2,13 +2,12 @@
 Basic manual test of AutoLineage tracking.
 """
 
-import os
+from pathlib import Path
 import pandas as pd
 from autolineage.tracker import DatasetTracker
 
 # Clean up old database
-if os.path.exists("lineage.db"):
-    os.remove("lineage.db")
+Path("lineage.db").unlink(missing_ok=True)
 
 # Create tracker
 tracker = DatasetTracker("lineage.db")
@@ -72,9 +71,9 @@ for ds in summary['datasets']:
 print(f"{'='*60}")
 print("LINEAGE GRAPH")
 print(f"{'='*60}")
-for edge in summary['graph']:
-    print(f"{edge['source']} → {edge['target']}")
-    print(f"  Operation: {edge['operation']} ({edge['operation_type']})")
+for source, target, operation, operation_type, _ in tracker.iter_graph():
+    print(f"{source} → {target}")
+    print(f"  Operation: {operation} ({operation_type})")
     print()
 
 tracker.close()
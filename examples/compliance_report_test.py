@@ -2,9 +2,8 @@
 Test EU AI Act compliance report generation.
 """
 
-import os
-if os.path.exists('lineage.db'):
-    os.remove('lineage.db')
+from pathlib import Path
+Path('lineage.db').unlink(missing_ok=True)
 
 # Generate some lineage data
 import autolineage.auto
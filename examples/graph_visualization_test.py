@@ -3,8 +3,8 @@ Test graph visualization.
 """
 
 import os
-if os.path.exists('lineage.db'):
-    os.remove('lineage.db')
+from pathlib import Path
+Path('lineage.db').unlink(missing_ok=True)
 
 # Enable automatic tracking
 import autolineage.auto
@@ -67,9 +67,11 @@ if _auto_tracker:
     print(f"  Sources: {stats['sources']}")
     print(f"  Sinks: {stats['sinks']}")
     
-    # Generate matplotlib graph
-    print("\n5. Generating static graph (PNG)...")
-    graph.visualize_matplotlib('lineage_graph.png')
+    # Generate matplotlib graph (set SKIP_PNG=1 to skip matplotlib's
+    # start-up cost, e.g. on CI)
+    if not os.environ.get("SKIP_PNG"):
+        print("\n5. Generating static graph (PNG)...")
+        graph.visualize_matplotlib('lineage_graph.png')
     
     # Generate plotly graph
     print("6. Generating interactive graph (HTML)...")
@@ -3,69 +3,78 @@ Inspect the lineage database contents.
 """
 
 import sqlite3
+import sys
 from datetime import datetime
 
 db = sqlite3.connect("lineage.db")
-db.row_factory = sqlite3.Row
+db.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+db.execute("PRAGMA mmap_size=268435456")
+db.execute("PRAGMA temp_store=MEMORY")
 cursor = db.cursor()
+cursor.arraysize = 1000
+
+
+def fetch_chunks(query):
+    """Yield the rows of a query in lists of up to 1000."""
+    cursor.execute(query)
+    while rows := cursor.fetchmany():
+        yield rows
+
+
+# One read transaction: every table is seen at the same point in time
+db.execute("BEGIN DEFERRED")
 
 print("="*60)
 print("DATABASE INSPECTION")
 print("="*60)
 
 # Count records
-datasets = cursor.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
-operations = cursor.execute("SELECT COUNT(*) FROM operations").fetchone()[0]
-lineage = cursor.execute("SELECT COUNT(*) FROM lineage").fetchone()[0]
-runs = cursor.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
-
-print(f"\nTable Counts:")
-print(f"  Datasets: {datasets}")
-print(f"  Operations: {operations}")
-print(f"  Lineage: {lineage}")
-print(f"  Runs: {runs}")
+datasets, operations, lineage, runs = cursor.execute("""
+    SELECT (SELECT COUNT(*) FROM datasets),
+           (SELECT COUNT(*) FROM operations),
+           (SELECT COUNT(*) FROM lineage),
+           (SELECT COUNT(*) FROM runs)
+""").fetchone()
 
-print("\n" + "="*60)
-print("DATASETS TABLE")
-print("="*60)
-for row in cursor.execute("SELECT * FROM datasets"):
-    print(f"\nID: {row['id']}")
-    print(f"File: {row['filepath']}")
-    print(f"Hash: {row['hash'][:16]}...")
-    print(f"Size: {row['size']} bytes")
-    print(f"Format: {row['format']}")
-    print(f"Created: {row['created_at']}")
+print(
+    f"\nTable Counts:\n"
+    f"  Datasets: {datasets}\n"
+    f"  Operations: {operations}\n"
+    f"  Lineage: {lineage}\n"
+    f"  Runs: {runs}"
+)
 
-print("\n" + "="*60)
-print("OPERATIONS TABLE")
-print("="*60)
-for row in cursor.execute("SELECT * FROM operations"):
-    print(f"\nID: {row['id']}")
-    print(f"Type: {row['operation_type']}")
-    print(f"Function: {row['function_name']}")
-    print(f"Code: {row['code_snippet']}")
-    print(f"Parameters: {row['parameters']}")
-    print(f"Executed: {row['executed_at']}")
+# One multi-line entry per row, written 1000 rows per stdout write.
+# Rows are plain tuples: each template's fields follow its SELECT order.
+TABLES = [
+    ("DATASETS",
+     "SELECT id, filepath, hash, size, format, created_at FROM datasets", (
+        "\nID: {}\nFile: {}\nHash: {:.16}...\n"
+        "Size: {} bytes\nFormat: {}\nCreated: {}\n"
+    )),
+    ("OPERATIONS",
+     "SELECT id, operation_type, function_name, code_snippet, parameters, "
+     "executed_at FROM operations", (
+        "\nID: {}\nType: {}\nFunction: {}\n"
+        "Code: {}\nParameters: {}\nExecuted: {}\n"
+    )),
+    ("LINEAGE",
+     "SELECT id, source_id, target_id, operation_id, relationship_type, "
+     "created_at FROM lineage", (
+        "\nID: {}\nSource: {}\nTarget: {}\n"
+        "Operation: {}\nType: {}\nCreated: {}\n"
+    )),
+    ("RUNS",
+     "SELECT id, script_path, start_time, end_time, status FROM runs", (
+        "\nID: {}\nScript: {}\nStart: {}\n"
+        "End: {}\nStatus: {}\n"
+    )),
+]
 
-print("\n" + "="*60)
-print("LINEAGE TABLE")
-print("="*60)
-for row in cursor.execute("SELECT * FROM lineage"):
-    print(f"\nID: {row['id']}")
-    print(f"Source: {row['source_id']}")
-    print(f"Target: {row['target_id']}")
-    print(f"Operation: {row['operation_id']}")
-    print(f"Type: {row['relationship_type']}")
-    print(f"Created: {row['created_at']}")
-
-print("\n" + "="*60)
-print("RUNS TABLE")
-print("="*60)
-for row in cursor.execute("SELECT * FROM runs"):
-    print(f"\nID: {row['id']}")
-    print(f"Script: {row['script_path']}")
-    print(f"Start: {row['start_time']}")
-    print(f"End: {row['end_time']}")
-    print(f"Status: {row['status']}")
+for title, query, template in TABLES:
+    print(f"\n{'='*60}\n{title} TABLE\n{'='*60}")
+    for rows in fetch_chunks(query):
+        sys.stdout.write("".join(template.format(*row) for row in rows))
 
+db.commit()
 db.close()
\ No newline at end of file
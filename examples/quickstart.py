@@ -19,36 +19,38 @@ tracker.start_run("quickstart.py")
 # 3. Do your normal data science work
 print("3. Doing data science work...")
 
-# Load data
-df = pd.DataFrame({
-    'product': ['A', 'B', 'C', 'D'],
-    'sales': [100, 150, 120, 200],
-    'profit': [20, 30, 25, 40]
-})
-df.to_csv('sales_data.csv', index=False)
-tracker.track_file('sales_data.csv', 'write')
+# All tracking calls below share one database transaction
+with tracker.batch():
+    # Load data
+    df = pd.DataFrame({
+        'product': ['A', 'B', 'C', 'D'],
+        'sales': [100, 150, 120, 200],
+        'profit': [20, 30, 25, 40]
+    })
+    df.to_csv('sales_data.csv', index=False)
+    tracker.track_file('sales_data.csv', 'write')
 
-# Clean data
-df_clean = df[df['sales'] > 100]
-df_clean.to_csv('sales_clean.csv', index=False)
+    # Clean data
+    df_clean = df[df['sales'] > 100]
+    df_clean.to_csv('sales_clean.csv', index=False)
 
-tracker.track_transformation(
-    source_files=['sales_data.csv'],
-    target_files=['sales_clean.csv'],
-    function_name='filter_sales',
-    code_snippet="df[df['sales'] > 100]"
-)
+    tracker.track_transformation(
+        source_files=['sales_data.csv'],
+        target_files=['sales_clean.csv'],
+        function_name='filter_sales',
+        code_snippet="df[df['sales'] > 100]"
+    )
 
-# Aggregate
-df_summary = df_clean.groupby('product')['profit'].sum().reset_index()
-df_summary.to_csv('sales_summary.csv', index=False)
+    # Aggregate
+    df_summary = df_clean.groupby('product')['profit'].sum().reset_index()
+    df_summary.to_csv('sales_summary.csv', index=False)
 
-tracker.track_transformation(
-    source_files=['sales_clean.csv'],
-    target_files=['sales_summary.csv'],
-    function_name='aggregate_profit',
-    code_snippet="df.groupby('product')['profit'].sum()"
-)
+    tracker.track_transformation(
+        source_files=['sales_clean.csv'],
+        target_files=['sales_summary.csv'],
+        function_name='aggregate_profit',
+        code_snippet="df.groupby('product')['profit'].sum()"
+    )
 
 # 4. End tracking
 print("4. Ending tracking...")
@@ -62,10 +64,8 @@ print(f"   Recorded {summary['operations_count']} operations")
 print(f"   Created {summary['lineage_edges_count']} lineage edges")
 
 print("\n6. Data Flow:")
-for edge in summary['graph']:
-    source_name = edge['source'].split('/')[-1]
-    target_name = edge['target'].split('/')[-1]
-    print(f"   {source_name} → {target_name} ({edge['operation']})")
+for line in tracker.iter_edge_descriptions():
+    print(f"   {line}")
 
 tracker.close()
 
@@ -1,21 +1,21 @@
 """Tests for database module."""
 
-import os
+import json
+import uuid
 import pytest
-from autolineage.database import LineageDatabase
+from autolineage.database import LineageDatabase, _LAYOUT_CACHE_SIZE
 
 
-def test_database_creation():
+@pytest.fixture
+def db():
+    """Fresh in-memory database for each test."""
+    database = LineageDatabase(":memory:")
+    yield database
+    database.close()
+
+
+def test_database_creation(db):
     """Test that database is created successfully."""
-    db_path = "test_lineage.db"
-    
-    # Clean up if exists
-    if os.path.exists(db_path):
-        os.remove(db_path)
-    
-    # Create database
-    db = LineageDatabase(db_path)
-    
     # Check tables exist
     cursor = db.cursor
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -26,21 +26,18 @@ def test_database_creation():
     assert "lineage" in tables
     assert "runs" in tables
     
-    db.close()
+    # Check lineage join indexes exist
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    indexes = [row[0] for row in cursor.fetchall()]
     
-    # Clean up
-    os.remove(db_path)
+    assert "idx_lineage_source" in indexes
+    assert "idx_lineage_target" in indexes
+    assert "idx_lineage_operation" in indexes
+    assert "idx_datasets_filepath" in indexes
 
 
-def test_add_dataset():
+def test_add_dataset(db):
     """Test adding a dataset."""
-    db_path = "test_lineage.db"
-    
-    if os.path.exists(db_path):
-        os.remove(db_path)
-    
-    db = LineageDatabase(db_path)
-    
     # Add dataset
     dataset_id = db.add_dataset(
         filepath="data.csv",
@@ -51,25 +48,21 @@ def test_add_dataset():
     
     assert dataset_id is not None
     assert len(dataset_id) == 36  # UUID length
+    assert uuid.UUID(dataset_id).version == 7  # Time-ordered
     
     # Verify it was added
     datasets = db.get_all_datasets()
     assert len(datasets) == 1
     assert datasets[0]['filepath'] == "data.csv"
     
-    db.close()
-    os.remove(db_path)
+    # Unchanged file is deduplicated, changed content gets a new row
+    assert db.add_dataset("data.csv", "abc123", 1024, "csv") == dataset_id
+    assert db.add_dataset("data.csv", "def456", 2048, "csv") != dataset_id
+    assert len(db.get_all_datasets()) == 2
 
 
-def test_add_operation():
+def test_add_operation(db):
     """Test adding an operation."""
-    db_path = "test_lineage.db"
-    
-    if os.path.exists(db_path):
-        os.remove(db_path)
-    
-    db = LineageDatabase(db_path)
-    
     # Add operation
     op_id = db.add_operation(
         operation_type="read",
@@ -83,20 +76,21 @@ def test_add_operation():
     operations = db.get_all_operations()
     assert len(operations) == 1
     assert operations[0]['function_name'] == "read_csv"
+    assert json.loads(operations[0]['parameters']) == {"sep": ","}
+    
+    # Empty parameters are stored as NULL
+    empty_id = db.add_operation(operation_type="read", parameters={})
+    empty_op = [op for op in db.get_all_operations() if op['id'] == empty_id][0]
+    assert empty_op['parameters'] is None
     
-    db.close()
-    os.remove(db_path)
+    # Payloads orjson rejects (non-string keys) fall back to json
+    int_id = db.add_operation(operation_type="read", parameters={1: "a"})
+    int_op = [op for op in db.get_all_operations() if op['id'] == int_id][0]
+    assert json.loads(int_op['parameters']) == {"1": "a"}
 
 
-def test_lineage_relationship():
+def test_lineage_relationship(db):
     """Test adding lineage relationship."""
-    db_path = "test_lineage.db"
-    
-    if os.path.exists(db_path):
-        os.remove(db_path)
-    
-    db = LineageDatabase(db_path)
-    
     # Add source and target datasets
     source_id = db.add_dataset("input.csv", "hash1", 1024, "csv")
     target_id = db.add_dataset("output.csv", "hash2", 2048, "csv")
@@ -116,14 +110,109 @@ def test_lineage_relationship():
     assert graph[0]['target'] == "output.csv"
     assert graph[0]['operation'] == "dropna"
     
-    db.close()
-    os.remove(db_path)
+    # Streaming path yields plain tuples
+    edges = list(db.get_lineage_graph_iter(batch=1))
+    assert len(edges) == 1
+    assert edges[0][:4] == ("input.csv", "output.csv", "dropna", "transform")
+    
+    # Printable lines use file names only
+    other_id = db.add_dataset("/data/out/final.csv", "hash3", 10, "csv")
+    db.add_lineage(target_id, other_id, op_id)
+    assert list(db.iter_edge_descriptions()) == [
+        "input.csv → output.csv (dropna)",
+        "output.csv → final.csv (dropna)",
+    ]
+
+
+def test_bulk_inserts_in_batch(db):
+    """Test bulk inserts inside a single batch transaction."""
+    with db.batch():
+        source_id, target_id = db.add_datasets_bulk([
+            ("input.csv", "hash1", 1024, "csv", None),
+            ("output.csv", "hash2", 2048, "csv", {"rows": 10}),
+        ])
+        (op_id,) = db.add_operations_bulk([("transform", "dropna", None, None)])
+        lineage_ids = db.add_lineage_bulk([(source_id, target_id, op_id)])
+        
+        # Nothing is committed until the batch ends
+        assert db.conn.in_transaction
+    
+    assert not db.conn.in_transaction
+    assert len(lineage_ids) == 1
+    assert len(db.get_all_datasets()) == 2
+    
+    graph = db.get_lineage_graph()
+    assert len(graph) == 1
+    assert graph[0]['source'] == "input.csv"
+    assert graph[0]['target'] == "output.csv"
+
+
+def test_layout_cache(db):
+    """Test saving and loading cached graph layouts."""
+    assert db.get_cached_layout("graph1") is None
+    
+    db.save_layout("graph1", {"a.csv": (0.0, 1.0), "b.csv": (2.5, -1.0)})
+    
+    layout = db.get_cached_layout("graph1")
+    assert layout == {"a.csv": (0.0, 1.0), "b.csv": (2.5, -1.0)}
+    
+    # Only the latest layouts are kept
+    for i in range(_LAYOUT_CACHE_SIZE):
+        db.save_layout(f"graph{i + 2}", {"a.csv": (0.0, float(i))})
+    assert db.get_cached_layout("graph1") is None
+    assert db.get_cached_layout("graph2") is not None
+    count = db.conn.execute("SELECT COUNT(*) FROM layout_cache").fetchone()[0]
+    assert count == _LAYOUT_CACHE_SIZE
+
+
+def test_hash_cache(db):
+    """Test that cached hashes are only returned for unchanged files."""
+    assert db.get_cached_hash("/data/a.csv", 1, 2, 1000, 42) is None
+    
+    db.save_hash("/data/a.csv", 1, 2, 1000, 42, "abc123")
+    assert db.get_cached_hash("/data/a.csv", 1, 2, 1000, 42) == "abc123"
+    
+    # Modified file (new mtime) misses the cache
+    assert db.get_cached_hash("/data/a.csv", 1, 2, 2000, 42) is None
+    
+    db.save_hash("/data/a.csv", 1, 2, 2000, 42, "def456")
+    assert db.get_cached_hash("/data/a.csv", 1, 2, 2000, 42) == "def456"
+
+
+def test_counts(db):
+    """Test aggregate counts and source/sink detection."""
+    assert db.get_counts() == {'datasets': 0, 'operations': 0, 'lineage': 0}
+    assert db.get_source_sink_counts() == (0, 0)
+    
+    # raw.csv -> clean.csv -> {features.csv, stats.csv}
+    raw = db.add_dataset("raw.csv", "hash1", 10, "csv")
+    clean = db.add_dataset("clean.csv", "hash2", 10, "csv")
+    features = db.add_dataset("features.csv", "hash3", 10, "csv")
+    stats = db.add_dataset("stats.csv", "hash4", 10, "csv")
+    op_id = db.add_operation("transform", "pipeline")
+    db.add_lineage(raw, clean, op_id)
+    db.add_lineage(clean, features, op_id)
+    db.add_lineage(clean, stats, op_id)
+    
+    assert db.get_counts() == {'datasets': 4, 'operations': 1, 'lineage': 3}
+    assert db.get_source_sink_counts() == (1, 2)
+    assert db.get_pure_sources() == ["raw.csv"]
+    assert db.get_pure_sinks() == ["features.csv", "stats.csv"]
 
 
 if __name__ == "__main__":
-    # Run tests
-    test_database_creation()
-    test_add_dataset()
-    test_add_operation()
-    test_lineage_relationship()
-    print("✅ All database tests passed!")
\ No newline at end of file
+    # Run tests, each against a fresh in-memory database
+    for test in [
+        test_database_creation,
+        test_add_dataset,
+        test_add_operation,
+        test_lineage_relationship,
+        test_bulk_inserts_in_batch,
+        test_layout_cache,
+        test_hash_cache,
+        test_counts,
+    ]:
+        database = LineageDatabase(":memory:")
+        test(database)
+        database.close()
+    print("✅ All database tests passed!")